@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Profile, Course, Subject, Exam, Question, StudentExam
+from django.db import transaction
+
+from .models import Profile, Course, Subject, Exam, Question, StudentExam, ExamStatistics
 
 # Profile
 @admin.register(Profile)
@@ -27,7 +29,41 @@ class ExamAdmin(admin.ModelAdmin):
 class QuestionAdmin(admin.ModelAdmin):
     list_display = ('question_text', 'exam', 'correct_option')
 
+# Statistics are only added to on submission; anything else that changes
+# scores has to rebuild them
+@admin.action(description='Rebuild statistics of the selected exams')
+def rebuild_statistics(modeladmin, request, queryset):
+    exam_ids = set(queryset.values_list('exam_id', flat=True))
+    for exam_id in exam_ids:
+        ExamStatistics.rebuild(exam_id)
+    modeladmin.message_user(request, f'Rebuilt the statistics of {len(exam_ids)} exam(s).')
+
+
 # StudentExam
 @admin.register(StudentExam)
 class StudentExamAdmin(admin.ModelAdmin):
     list_display = ('student', 'exam', 'score', 'is_submitted', )
+    actions = [rebuild_statistics]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Deletions rebuild through the post_delete signal
+        if change and form.has_changed():
+            exam_ids = {obj.exam_id, form.initial.get('exam', obj.exam_id)}
+            transaction.on_commit(lambda: [ExamStatistics.rebuild(exam_id) for exam_id in exam_ids])
+
+# ExamStatistics (derived from StudentExam, so read-only)
+@admin.register(ExamStatistics)
+class ExamStatisticsAdmin(admin.ModelAdmin):
+    list_display = ('exam', 'count', 'min_score', 'max_score', 'pass_count')
+    exclude = ('score_index',)
+    actions = [rebuild_statistics]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,155 @@
+"""
+Item analysis: classical test statistics for every question of an exam,
+computed with NumPy from the packed responses kept on each submitted
+attempt (StudentExam.responses).
+"""
+import numpy as np
+
+from .grading import get_layout
+from .models import StudentExam
+
+# Option values 1-4 of a packed response; 0 is unanswered
+OPTION_LABELS = ('A', 'B', 'C', 'D')
+
+# Rows of the response matrix multiplied at a time, bounding the float copy
+MATRIX_CHUNK_ROWS = 8192
+
+RESPONSE_CHUNK_SIZE = 5000
+
+
+def laid_out(answer_key, packed, layout, layouts):
+    """
+    Packed responses stored with layout ``layout``, in the question order
+    of ``answer_key``, or None when that layout was never stored.
+    ``layouts`` memoises the earlier layouts between calls.
+    """
+    packed = bytes(packed)
+    if layout == answer_key.layout:
+        return packed
+    if layout not in layouts:
+        layouts[layout] = get_layout(answer_key.exam_id, layout)
+    question_ids = layouts[layout]
+    if question_ids is None:
+        return None
+    return answer_key.repack(packed, question_ids)
+
+
+def response_matrix(answer_key):
+    """
+    The students x questions matrix of chosen options (0 unanswered, 1-4)
+    of every submitted attempt, in the question order of ``answer_key``.
+    Attempts made with an earlier layout of the questions are laid out
+    again from the stored layout; those from before layouts were kept are
+    left out. Returns the matrix and how many were left out.
+    """
+    width = len(answer_key)
+    rows = []
+    layouts = {}
+    skipped = 0
+    attempts = StudentExam.objects.filter(
+        exam_id=answer_key.exam_id, is_submitted=True, responses__isnull=False
+    ).values_list('responses', 'key_version')
+
+    for packed, layout in attempts.iterator(chunk_size=RESPONSE_CHUNK_SIZE):
+        packed = laid_out(answer_key, packed, layout, layouts)
+        if packed is None:
+            skipped += 1
+            continue
+        rows.append(packed)
+
+    matrix = np.frombuffer(b''.join(rows), dtype=np.uint8).reshape(len(rows), width)
+    return matrix, skipped
+
+
+def item_analysis(choices, correct):
+    """
+    Statistics for a students x questions matrix of chosen options and the
+    index of each question's correct option (0-3, or -1 when it has none):
+
+    difficulty      share of students answering correctly, per question
+    discrimination  point-biserial correlation between answering the
+                    question correctly and the score on the other questions
+                    (NaN when either does not vary)
+    options         students choosing each option, per question, with
+                    column 0 counting those who left it blank
+    kr20            KR-20 reliability of the whole exam (None when undefined)
+    """
+    students, questions = choices.shape
+    correct = np.asarray(correct, dtype=np.int16)
+    keyed = correct >= 0
+    right = (choices == (correct + 1)) & keyed
+
+    options = np.stack([(choices == value).sum(axis=0) for value in range(len(OPTION_LABELS) + 1)], axis=1)
+    if not students:
+        nan = np.full(questions, np.nan)
+        return {'students': 0, 'difficulty': nan, 'discrimination': nan, 'options': options, 'kr20': None}
+
+    totals = right.sum(axis=1, dtype=np.int64)
+    p = right.sum(axis=0, dtype=np.int64) / students
+    # Sum of the totals of the students who got each question right
+    totals_right = np.zeros(questions)
+    for start in range(0, students, MATRIX_CHUNK_ROWS):
+        block = slice(start, start + MATRIX_CHUNK_ROWS)
+        totals_right += totals[block].astype(np.float64) @ right[block].astype(np.float64)
+
+    item_variance = p * (1 - p)
+    total_variance = totals.var()
+    covariance = totals_right / students - p * totals.mean()
+    # Against the rest of the exam, so the question does not correlate with itself
+    rest_covariance = covariance - item_variance
+    rest_variance = total_variance + item_variance - 2 * covariance
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discrimination = rest_covariance / np.sqrt(item_variance * rest_variance)
+    discrimination[~keyed | (item_variance == 0) | (rest_variance <= 0)] = np.nan
+
+    k = int(keyed.sum())
+    if k > 1 and total_variance > 0:
+        kr20 = float(k / (k - 1) * (1 - item_variance[keyed].sum() / total_variance))
+    else:
+        kr20 = None
+
+    difficulty = np.where(keyed, p, np.nan)
+    return {
+        'students': students,
+        'difficulty': difficulty,
+        'discrimination': discrimination,
+        'options': options,
+        'kr20': kr20,
+    }
+
+
+def _rounded(value, digits):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def item_rows(analysis, answer_key, question_texts):
+    """
+    One row per question for the item analysis page; ``question_texts``
+    maps question id to its text
+    """
+    students = analysis['students']
+    rows = []
+    for position, question_id in enumerate(answer_key.question_ids):
+        counts = analysis['options'][position]
+        correct = answer_key.correct[position]
+        discrimination = _rounded(analysis['discrimination'][position], 2)
+        rows.append({
+            'number': position + 1,
+            'text': question_texts.get(question_id, ''),
+            'correct': OPTION_LABELS[correct] if correct >= 0 else None,
+            'difficulty': _rounded(analysis['difficulty'][position] * 100, 1),
+            'discrimination': discrimination,
+            # Rule of thumb: below 0.2 the question barely separates strong from weak students
+            'needs_review': discrimination is not None and discrimination < 0.2,
+            'options': [
+                {
+                    'label': label,
+                    'count': int(counts[value]),
+                    'percent': round(counts[value] / students * 100, 1) if students else 0,
+                    'is_correct': value - 1 == correct,
+                }
+                for value, label in enumerate(OPTION_LABELS, start=1)
+            ],
+            'blank': int(counts[0]),
+        })
+    return rows
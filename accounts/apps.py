@@ -1,7 +1,21 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
 
-    
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import writebehind
+
+        if writebehind.enabled():
+            # Start the flusher, replaying any journal left by a crash, with the first request
+            request_started.connect(start_write_behind, dispatch_uid='start_write_behind')
+
+
+def start_write_behind(**kwargs):
+    from . import writebehind
+
+    writebehind.get_write_behind()
+    request_started.disconnect(dispatch_uid='start_write_behind')
@@ -0,0 +1,68 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import verify_password
+
+UserModel = get_user_model()
+
+
+class ProfileBackend(ModelBackend):
+    """
+    ModelBackend that loads the user together with their profile and
+    course, so ``user.profile`` and ``user.profile.course`` never need a
+    query of their own
+    """
+    def users(self):
+        return UserModel._default_manager.select_related('profile__course')
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = self.users().get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # Hash anyway, so an unknown username takes as long as a wrong password
+            UserModel().set_password(password)
+        else:
+            if user.check_password(password) and self.user_can_authenticate(user):
+                return user
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return
+        try:
+            user = await self.users().aget(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            await sync_to_async(UserModel().set_password, thread_sensitive=False)(password)
+        else:
+            if await self.acheck_password(user, password) and self.user_can_authenticate(user):
+                return user
+
+    async def acheck_password(self, user, password):
+        """
+        Like user.acheck_password(), which hashes on the event loop, but
+        hashing in a thread pool; hashlib releases the GIL, so concurrent
+        logins spread over every core
+        """
+        is_correct, must_update = await sync_to_async(verify_password, thread_sensitive=False)(
+            password, user.password
+        )
+        if is_correct and must_update:
+            # Rehash with the current hasher and work factor
+            await sync_to_async(user.set_password, thread_sensitive=False)(password)
+            # Not a password change, so no password_changed notification
+            user._password = None
+            await user.asave(update_fields=['password'])
+        return is_correct
+
+    def get_user(self, user_id):
+        user = self.users().filter(pk=user_id).first()
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        user = await self.users().filter(pk=user_id).afirst()
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .models import Exam, Question
+from .shuffling import paper_order
+
+PAPER_TIMEOUT = 60 * 60 * 24
+
+# Where a question card's options go, while its pieces are rendered
+OPTIONS_PLACEHOLDER = '<!-- options -->'
+
+
+def exam_version(exam_id):
+    """
+    Current version of an exam's question paper, kept on the exam row so
+    every process agrees on it. Anything derived from the questions should
+    be cached under this version.
+    """
+    version = Exam.objects.filter(pk=exam_id).values_list('questions_version', flat=True).first()
+    return version or 0
+
+
+def bump_exam_version(exam_id):
+    """
+    Invalidate everything cached for an exam's questions. Call it in the
+    transaction that changes them, so the new version commits with them.
+    """
+    Exam.objects.filter(pk=exam_id).update(questions_version=F('questions_version') + 1)
+
+
+def get_paper_pieces(exam_id, version=None):
+    """
+    Rendered pieces of an exam's question paper, for every question in
+    answer key order: the card before its options, each option, and the
+    card after them. Rendered once per paper version and shared; pass
+    ``version`` when the exam row is already loaded.
+    """
+    if version is None:
+        version = exam_version(exam_id)
+    key = f'exam:{exam_id}:paper_pieces:{version}'
+    pieces = cache.get(key)
+    if pieces is None:
+        pieces = []
+        for question in Question.objects.filter(exam_id=exam_id).order_by('id'):
+            card = render_to_string('accounts/partials/exam_question.html', {
+                'question': question,
+                'options': mark_safe(OPTIONS_PLACEHOLDER),
+            })
+            head, _, tail = card.partition(OPTIONS_PLACEHOLDER)
+            options = [
+                render_to_string('accounts/partials/exam_option.html', {
+                    'question': question,
+                    'number': number,
+                    'value': f'option{number}',
+                    'text': getattr(question, f'option{number}'),
+                })
+                for number in range(1, 5)
+                # The first two options are always shown
+                if number <= 2 or getattr(question, f'option{number}')
+            ]
+            pieces.append((head, options, tail))
+        cache.set(key, pieces, PAPER_TIMEOUT)
+    return pieces
+
+
+def get_exam_paper(exam_id, seed=None, version=None):
+    """
+    Rendered question list for an attempt, in the order its paper seed
+    gives (see shuffling.py). Only the shared pieces are cached; putting
+    them in order is a single join.
+    """
+    pieces = get_paper_pieces(exam_id, version)
+    parts = []
+    for position, options in paper_order(seed, [len(options) for head, options, tail in pieces]):
+        head, option_html, tail = pieces[position]
+        parts.append(head)
+        parts.extend(option_html[index] for index in options)
+        parts.append(tail)
+    return mark_safe(''.join(parts))
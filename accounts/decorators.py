@@ -0,0 +1,23 @@
+from functools import wraps
+
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect
+
+
+def role_required(role):
+    """
+    Log in first, then only let users whose profile has ``role`` through;
+    anybody else is sent back to the login page. The role comes from
+    ``request.profile``, which UserContextMiddleware loads with the user.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.profile.role != role:
+                return redirect('login')
+            return view(request, *args, **kwargs)
+        return login_required(wrapped)
+    return decorator
+
+
+teacher_required = role_required('teacher')
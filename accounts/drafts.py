@@ -0,0 +1,45 @@
+from django.db import transaction
+
+from .grading import get_layout
+from .models import AnswerDraft
+
+
+def _current_packed(draft, answer_key):
+    """
+    The draft's answers packed for ``answer_key``, re-packing drafts saved
+    with an earlier layout of the questions
+    """
+    if draft is None:
+        return b''
+    if draft.key_version == answer_key.layout:
+        return bytes(draft.answers)
+    question_ids = get_layout(answer_key.exam_id, draft.key_version)
+    if question_ids is None:
+        # Saved before layouts were kept, and no longer readable
+        return b''
+    return answer_key.repack(bytes(draft.answers), question_ids)
+
+
+def draft_answers(student_exam, answer_key):
+    """
+    Autosaved answers of an attempt, as question id to option value
+    """
+    draft = AnswerDraft.objects.filter(student_exam=student_exam).first()
+    return answer_key.unpack(_current_packed(draft, answer_key))
+
+
+def autosave(student_exam, answer_key, changes):
+    """
+    Apply changed answers (question id to option value, '' to clear) to
+    the attempt's draft; returns how many questions are answered
+    """
+    with transaction.atomic():
+        draft = AnswerDraft.objects.select_for_update().filter(student_exam=student_exam).first()
+        packed = answer_key.pack(changes, _current_packed(draft, answer_key))
+        if draft is None:
+            AnswerDraft.objects.create(student_exam=student_exam, answers=packed, key_version=answer_key.layout)
+        else:
+            draft.answers = packed
+            draft.key_version = answer_key.layout
+            draft.save(update_fields=['answers', 'key_version', 'updated_at'])
+    return sum(1 for choice in packed if choice)
@@ -0,0 +1,87 @@
+import csv
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .models import Result
+
+RESULT_COLUMNS = ('student', 'roll_number', 'score', 'attempted_on')
+
+# Rows fetched from the database (and written per Parquet batch) at a time
+EXPORT_CHUNK_SIZE = 2000
+
+
+def result_rows(exam_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Result rows for an exam as tuples in RESULT_COLUMNS order, fetched
+    from a database cursor in chunks rather than loaded all at once
+    """
+    return Result.objects.filter(exam_id=exam_id).order_by('id').values_list(
+        'student__user__username', 'student__roll_number', 'score', 'attempted_on'
+    ).iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    """
+    File-like object that hands back what is written, so csv.writer can
+    produce one line at a time for a streaming response
+    """
+    def write(self, value):
+        return value
+
+
+def csv_line(writer, row):
+    username, roll_number, score, attempted_on = row
+    return writer.writerow([username, roll_number or '', score, attempted_on.isoformat()])
+
+
+def iter_csv(exam_id, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(RESULT_COLUMNS)
+    for row in result_rows(exam_id, chunk_size):
+        yield csv_line(writer, row)
+
+
+async def aiter_csv(exam_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    iter_csv for ASGI: Django would drain a sync iterator into a list
+    before sending anything, so the cursor is read one chunk at a time in
+    the ORM's thread and each chunk of lines goes out before the next read
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(RESULT_COLUMNS)
+    rows = await sync_to_async(result_rows)(exam_id, chunk_size)
+    next_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    while chunk := await next_chunk():
+        yield ''.join(csv_line(writer, row) for row in chunk)
+
+
+def write_parquet(exam_id, path, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Write an exam's results to a Parquet file one record batch per chunk.
+    Returns the number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('student', pa.string()),
+        ('roll_number', pa.string()),
+        ('score', pa.float64()),
+        ('attempted_on', pa.timestamp('us', tz='UTC')),
+    ])
+
+    rows = result_rows(exam_id, chunk_size)
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            columns = list(zip(*chunk))
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            written += len(chunk)
+    return written
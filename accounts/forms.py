@@ -0,0 +1,28 @@
+from django.contrib.auth.forms import PasswordResetForm
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+
+from .models import Profile
+
+
+class StudentPasswordResetForm(PasswordResetForm):
+    """
+    Django's password reset, which only mails accounts that already have a
+    usable password, extended to student accounts without one. Students
+    imported with --require-reset (or a blank password) are created that
+    way and set their first password through this form; nothing else in
+    the app signs them in. Other accounts without a usable password
+    (staff, or anyone authenticated elsewhere) keep Django's behaviour
+    and get no link, as do inactive accounts.
+    """
+
+    def get_users(self, email):
+        users = list(super().get_users(email))
+        known = {user.pk for user in users}
+        students = Profile.objects.filter(
+            role='student',
+            user__email__iexact=email,
+            user__is_active=True,
+            user__password__startswith=UNUSABLE_PASSWORD_PREFIX,
+        ).select_related('user')
+        users += [profile.user for profile in students if profile.user_id not in known]
+        return users
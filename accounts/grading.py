@@ -0,0 +1,185 @@
+import hashlib
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from .caching import exam_version, bump_exam_version
+from .models import PaperLayout, Question
+
+# Radio values posted by the exam form, indexed by correct_option position
+OPTION_VALUES = ('option1', 'option2', 'option3', 'option4')
+
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+LOCAL_CACHE_SIZE = 256
+
+
+def ids_to_bytes(question_ids):
+    ids = array('q', question_ids)
+    if sys.byteorder == 'big':
+        ids.byteswap()
+    return ids.tobytes()
+
+
+def ids_from_bytes(data):
+    ids = array('q')
+    ids.frombytes(bytes(data))
+    if sys.byteorder == 'big':
+        ids.byteswap()
+    return ids
+
+
+def layout_digest(question_ids):
+    """
+    63-bit hash of an ordered list of question ids, naming its PaperLayout
+    """
+    digest = hashlib.blake2b(ids_to_bytes(question_ids), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') >> 1
+
+
+class AnswerKey:
+    """
+    Precompiled answer key for an exam: question ids in display order and
+    the index of each correct option (0 for option1, -1 if unset).
+    ``layout`` is the digest of the question order, stored with answers
+    packed by this key (see PaperLayout).
+    """
+    __slots__ = ('exam_id', 'version', 'question_ids', 'correct', 'layout')
+
+    def __init__(self, exam_id, version, question_ids, correct, layout):
+        self.exam_id = exam_id
+        self.version = version
+        self.question_ids = question_ids
+        self.correct = correct
+        self.layout = layout
+
+    @classmethod
+    def build(cls, exam_id, version):
+        question_ids = array('q')
+        correct = array('b')
+        rows = Question.objects.filter(exam_id=exam_id).order_by('id').values_list('id', 'correct_option')
+        for question_id, correct_option in rows:
+            question_ids.append(question_id)
+            correct.append(OPTION_VALUES.index(correct_option) if correct_option in OPTION_VALUES else -1)
+        layout = layout_digest(question_ids)
+        if question_ids:
+            # Answers are only ever packed with a layout that is stored
+            PaperLayout.objects.get_or_create(
+                exam_id=exam_id, digest=layout, defaults={'question_ids': ids_to_bytes(question_ids)}
+            )
+        return cls(exam_id, version, question_ids, correct, layout)
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def grade(self, answers):
+        """
+        Number of correct answers in a mapping of question id (as posted
+        by the form) to the chosen option value
+        """
+        score = 0
+        for question_id, index in zip(self.question_ids, self.correct):
+            if index >= 0 and answers.get(str(question_id)) == OPTION_VALUES[index]:
+                score += 1
+        return score
+
+    def pack(self, answers, packed=b''):
+        """
+        Answers as one byte per question in key order: 0 for unanswered,
+        1-4 for option1-option4. Answers in ``answers`` (question id to
+        option value, '' to clear) are applied over ``packed``.
+        """
+        packed = bytearray(packed.ljust(len(self), b'\0')[:len(self)])
+        for position, question_id in enumerate(self.question_ids):
+            value = answers.get(str(question_id))
+            if value is None:
+                continue
+            packed[position] = OPTION_VALUES.index(value) + 1 if value in OPTION_VALUES else 0
+        return bytes(packed)
+
+    def repack(self, packed, question_ids):
+        """
+        Answers packed in the order of ``question_ids`` (an earlier layout),
+        packed again in this key's order. Answers to questions that are no
+        longer in the exam are dropped.
+        """
+        positions = {question_id: position for position, question_id in enumerate(self.question_ids)}
+        repacked = bytearray(len(self))
+        for question_id, choice in zip(question_ids, packed):
+            position = positions.get(question_id)
+            if position is not None:
+                repacked[position] = choice
+        return bytes(repacked)
+
+    def unpack(self, packed):
+        """
+        Mapping of question id to option value, as the form would post it
+        """
+        return {
+            str(question_id): OPTION_VALUES[choice - 1]
+            for question_id, choice in zip(self.question_ids, packed)
+            if 0 < choice <= len(OPTION_VALUES)
+        }
+
+
+_local_keys = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _cache_key(exam_id, version):
+    return f'exam:{exam_id}:answer_key:{version}'
+
+
+def get_answer_key(exam_id, version=None):
+    """
+    Answer key for the current version of an exam, from the process-local
+    cache, then the shared cache, and only then the database. Pass
+    ``version`` (Exam.questions_version) when the exam row is already loaded.
+    """
+    if version is None:
+        version = exam_version(exam_id)
+
+    with _local_lock:
+        answer_key = _local_keys.get(exam_id)
+        if answer_key is not None and answer_key.version == version:
+            _local_keys.move_to_end(exam_id)
+            return answer_key
+
+    packed = cache.get(_cache_key(exam_id, version))
+    if packed is not None:
+        answer_key = AnswerKey(exam_id, version, *packed)
+    else:
+        answer_key = AnswerKey.build(exam_id, version)
+        cache.set(
+            _cache_key(exam_id, version),
+            (answer_key.question_ids, answer_key.correct, answer_key.layout),
+            ANSWER_KEY_TIMEOUT,
+        )
+
+    with _local_lock:
+        _local_keys[exam_id] = answer_key
+        _local_keys.move_to_end(exam_id)
+        while len(_local_keys) > LOCAL_CACHE_SIZE:
+            _local_keys.popitem(last=False)
+    return answer_key
+
+
+def get_layout(exam_id, layout):
+    """
+    Question ids of an exam's stored layout, or None for a digest that was
+    never stored (answers saved before layouts were kept)
+    """
+    data = PaperLayout.objects.filter(exam_id=exam_id, digest=layout).values_list('question_ids', flat=True).first()
+    return None if data is None else ids_from_bytes(data)
+
+
+def invalidate_answer_key(exam_id):
+    """
+    Move an exam to a new version; call it in the transaction that
+    changes its questions
+    """
+    bump_exam_version(exam_id)
+    with _local_lock:
+        _local_keys.pop(exam_id, None)
@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with the work factor taken from settings.PASSWORD_HASH_ITERATIONS.
+
+    It shares Django's "pbkdf2_sha256" algorithm name, so existing hashes
+    keep verifying; a hash made with a different iteration count is
+    rewritten at the next successful login.
+    """
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
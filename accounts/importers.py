@@ -0,0 +1,244 @@
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .grading import OPTION_VALUES, invalidate_answer_key
+from .models import Course, Profile, Question
+
+QUESTION_FIELDS = ('question_text', 'option1', 'option2', 'option3', 'option4', 'correct_option')
+
+# Rows inserted per INSERT statement
+IMPORT_BATCH_SIZE = 500
+
+# Only the first errors are kept; the rest are just counted
+MAX_REPORTED_ERRORS = 100
+
+# Letters shown to students, accepted as shorthand for option1..option4
+OPTION_LETTERS = {'A': 'option1', 'B': 'option2', 'C': 'option3', 'D': 'option4'}
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def detect_format(filename):
+    """
+    'csv' or 'jsonl' from a file name. JSON uploads must hold one object
+    per line so they can be read without loading the whole file.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.json', '.jsonl', '.ndjson'):
+        return 'jsonl'
+    raise ValueError('Upload a .csv or .jsonl file')
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line number, row dict) from a binary stream, one row at a time
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def build_question(exam, row):
+    """
+    Validated, unsaved Question for one imported row
+    """
+    if row is None:
+        raise ValidationError('Not a valid question object')
+
+    values = {field: str(row.get(field) or '').strip() for field in QUESTION_FIELDS}
+    correct_option = values['correct_option']
+    values['correct_option'] = OPTION_LETTERS.get(correct_option.upper(), correct_option)
+
+    question = Question(exam=exam, **values)
+    question.full_clean(exclude=['exam'])
+
+    if question.correct_option not in OPTION_VALUES:
+        raise ValidationError('correct_option must be one of option1-option4 or A-D')
+    if not getattr(question, question.correct_option):
+        raise ValidationError(f'{question.correct_option} is marked correct but is empty')
+    return question
+
+
+def import_questions(exam, stream, fmt):
+    """
+    Stream questions from a CSV or JSON Lines file into ``exam``.
+
+    Rows are validated as they are read and inserted in batches inside
+    one transaction; invalid rows are skipped and reported by line.
+    """
+    report = ImportReport()
+    batch = []
+
+    with transaction.atomic():
+        for line, row in read_rows(stream, fmt):
+            try:
+                batch.append(build_question(exam, row))
+            except ValidationError as error:
+                report.add_error(line, '; '.join(error.messages))
+                continue
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                Question.objects.bulk_create(batch)
+                report.created += len(batch)
+                batch = []
+
+        if batch:
+            Question.objects.bulk_create(batch)
+            report.created += len(batch)
+
+        # bulk_create sends no post_save signals, so invalidate here
+        if report.created:
+            invalidate_answer_key(exam.id)
+
+    return report
+
+
+# ===== Student roster import =====
+
+STUDENT_FIELDS = ('username', 'email', 'password', 'course', 'roll_number')
+
+STUDENT_BATCH_SIZE = 1000
+
+
+def _init_hasher():
+    django.setup()
+
+
+def _hash_passwords(pool, passwords):
+    """
+    Hashes for a batch of passwords, computed in the process pool when
+    there is one. Blank passwords become unusable, so the student sets one
+    through the password reset link (StudentPasswordResetForm).
+    """
+    if pool is None:
+        return [make_password(password or None) for password in passwords]
+    return pool.map(make_password, [password or None for password in passwords], chunksize=16)
+
+
+def _insert_students(rows, hashes, report):
+    users = [
+        User(username=row['username'], email=row['email'], password=password)
+        for row, password in zip(rows, hashes)
+    ]
+
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        if any(user.pk is None for user in users):
+            # Backends that cannot return ids from a bulk insert
+            ids = dict(User.objects.filter(
+                username__in=[user.username for user in users]
+            ).values_list('username', 'id'))
+            for user in users:
+                user.pk = ids[user.username]
+
+        Profile.objects.bulk_create([
+            Profile(user=user, role='student', approved=True, course=row['course'], roll_number=row['roll_number'])
+            for user, row in zip(users, rows)
+        ])
+    report.created += len(users)
+
+
+def import_students(stream, workers=None, require_reset=False, batch_size=STUDENT_BATCH_SIZE):
+    """
+    Stream a CSV roster (username, email, password, course, roll_number)
+    into User and Profile rows.
+
+    Users and profiles are bulk-inserted one batch per transaction, and
+    password hashing for the next batch runs in a process pool while the
+    current one is written. With ``require_reset`` (or a blank password)
+    accounts get an unusable password instead, so no hashing is done and
+    students must set one through the password reset flow.
+    """
+    report = ImportReport()
+    courses = {course.name: course for course in Course.objects.all()}
+    seen = set()
+    pool = None
+    if not require_reset and workers != 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_hasher)
+
+    def batches():
+        batch = []
+        for line, row in read_rows(stream, 'csv'):
+            values = {field: (row.get(field) or '').strip() for field in STUDENT_FIELDS}
+            if not values['username']:
+                report.add_error(line, 'username is required')
+                continue
+            if values['username'] in seen:
+                report.add_error(line, f"duplicate username {values['username']}")
+                continue
+            if values['course'] not in courses:
+                report.add_error(line, f"unknown course {values['course']!r}")
+                continue
+            seen.add(values['username'])
+            values['course'] = courses[values['course']]
+            values['roll_number'] = values['roll_number'] or None
+            batch.append((line, values))
+
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def without_existing(batch):
+        existing = set(User.objects.filter(
+            username__in=[values['username'] for _, values in batch]
+        ).values_list('username', flat=True))
+        rows = []
+        for line, values in batch:
+            if values['username'] in existing:
+                report.add_error(line, f"user {values['username']} already exists")
+            else:
+                rows.append(values)
+        return rows
+
+    try:
+        pending = None
+        for batch in batches():
+            rows = without_existing(batch)
+            passwords = ['' if require_reset else values['password'] for values in rows]
+            hashes = _hash_passwords(pool, passwords)
+            if pending:
+                _insert_students(*pending, report)
+            pending = (rows, hashes)
+        if pending:
+            _insert_students(*pending, report)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return report
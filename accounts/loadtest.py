@@ -0,0 +1,393 @@
+"""
+In-process load test: a cohort of simulated students logs in, opens the
+dashboard, opens an exam and submits it, all driven concurrently through
+the project's WSGI application (threads) or ASGI application (asyncio
+tasks). No server or outside service is needed. The same scenario can
+also be sent over HTTP to a running server (HTTPLoadTest).
+"""
+import asyncio
+import contextvars
+import http.client
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode
+from wsgiref.util import setup_testing_defaults
+
+from asgiref.sync import sync_to_async
+from django.core.signals import got_request_exception
+from django.db import DatabaseError, connections
+from django.urls import reverse
+
+from .grading import get_answer_key, OPTION_VALUES
+
+ENDPOINTS = ('login', 'student_dashboard', 'student_take_exam GET', 'student_take_exam POST')
+
+# Requests are sent with this host, which must be allowed while the test runs
+HOST = 'testserver'
+
+# SQLSTATEs of lock contention: deadlock, lock not available, serialization
+# failure (PostgreSQL)
+LOCK_SQLSTATES = {'40P01', '55P03', '40001'}
+# MySQL error numbers: lock wait timeout, deadlock
+LOCK_ERRNOS = {1205, 1213}
+LOCK_ERROR_NAMES = {'DeadlockDetected', 'LockNotAvailable', 'SerializationFailure'}
+
+
+def is_lock_error(error):
+    """
+    Whether a database error was caused by lock contention, on any backend.
+    Django re-raises driver errors as its own classes with the driver's
+    exception as the cause, so the whole chain is checked.
+    """
+    if not isinstance(error, DatabaseError):
+        return False
+    while error is not None:
+        if type(error).__name__ in LOCK_ERROR_NAMES:
+            return True
+        if (getattr(error, 'sqlstate', None) or getattr(error, 'pgcode', None)) in LOCK_SQLSTATES:
+            return True
+        if error.args and isinstance(error.args[0], int) and error.args[0] in LOCK_ERRNOS:
+            return True
+        # SQLite: "database is locked" or "database table is locked"
+        if 'locked' in str(error):
+            return True
+        error = error.__cause__
+    return False
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock_errors = 0
+
+    def summary(self, elapsed):
+        ordered = sorted(self.latencies)
+        return {
+            'requests': len(ordered),
+            'errors': self.errors,
+            'lock_errors': self.lock_errors,
+            'p50': percentile(ordered, 0.50) * 1000,
+            'p95': percentile(ordered, 0.95) * 1000,
+            'p99': percentile(ordered, 0.99) * 1000,
+            'throughput': len(ordered) / elapsed if elapsed else 0,
+        }
+
+
+class LoadReport:
+    def __init__(self, endpoints=ENDPOINTS):
+        self.endpoints = {name: EndpointStats() for name in endpoints}
+        self.elapsed = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency, ok):
+        with self._lock:
+            stats = self.endpoints[endpoint]
+            stats.latencies.append(latency)
+            if not ok:
+                stats.errors += 1
+
+    def record_lock_error(self, endpoint):
+        with self._lock:
+            self.endpoints[endpoint].lock_errors += 1
+
+    def summaries(self):
+        return {name: stats.summary(self.elapsed) for name, stats in self.endpoints.items()}
+
+    def write(self, out=sys.stdout):
+        total = sum(len(stats.latencies) for stats in self.endpoints.values())
+        out.write(f'{total} requests in {self.elapsed:.2f}s ({total / self.elapsed:.1f} req/s)\n\n')
+        out.write(f"{'endpoint':<24}{'reqs':>7}{'errors':>8}{'locked':>8}"
+                  f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}\n")
+        for name, row in self.summaries().items():
+            out.write(
+                f"{name:<24}{row['requests']:>7}{row['errors']:>8}{row['lock_errors']:>8}"
+                f"{row['p50']:>9.1f}{row['p95']:>9.1f}{row['p99']:>9.1f}{row['throughput']:>9.1f}\n"
+            )
+
+
+class WSGISession:
+    """
+    Minimal browser session against a WSGI callable: keeps cookies and
+    sends the CSRF token with every POST
+    """
+    def __init__(self, application):
+        self.application = application
+        self.cookies = {}
+
+    def request(self, method, path, data=None):
+        body = urlencode(data or {}).encode()
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'HTTP_HOST': HOST,
+            'HTTP_COOKIE': '; '.join(f'{name}={value}' for name, value in self.cookies.items()),
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': BytesIO(body),
+        }
+        setup_testing_defaults(environ)
+
+        status_holder = []
+
+        def start_response(status, headers, exc_info=None):
+            status_holder.append(int(status.split()[0]))
+            for name, value in headers:
+                if name.lower() == 'set-cookie':
+                    for morsel in SimpleCookie(value).values():
+                        self.cookies[morsel.key] = morsel.value
+
+        result = self.application(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return status_holder[0], content
+
+    def post(self, path, data):
+        data = dict(data, csrfmiddlewaretoken=self.cookies.get('csrftoken', ''))
+        return self.request('POST', path, data)
+
+    def close(self):
+        pass
+
+
+class HTTPSession(WSGISession):
+    """
+    The same browser session against a live server, over one keep-alive
+    connection
+    """
+    def __init__(self, host, port):
+        self.connection = http.client.HTTPConnection(host, port, timeout=60)
+        self.cookies = {}
+
+    def request(self, method, path, data=None):
+        body = urlencode(data or {}).encode()
+        headers = {
+            'Cookie': '; '.join(f'{name}={value}' for name, value in self.cookies.items()),
+            'Content-Type': 'application/x-www-form-urlencoded',
+        }
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # The server closed the kept-alive connection (sync workers do); reconnect
+            self.connection.close()
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+        content = response.read()
+        for name, value in response.getheaders():
+            if name.lower() == 'set-cookie':
+                for morsel in SimpleCookie(value).values():
+                    self.cookies[morsel.key] = morsel.value
+        return response.status, content
+
+    def close(self):
+        self.connection.close()
+
+
+class ASGISession:
+    """
+    The same browser session driven through an ASGI callable
+    """
+    def __init__(self, application):
+        self.application = application
+        self.cookies = {}
+
+    async def request(self, method, path, data=None):
+        body = urlencode(data or {}).encode()
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', HOST.encode()),
+                (b'cookie', '; '.join(f'{name}={value}' for name, value in self.cookies.items()).encode()),
+                (b'content-type', b'application/x-www-form-urlencoded'),
+                (b'content-length', str(len(body)).encode()),
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': (HOST, 80),
+        }
+        request_body = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        finished = asyncio.Event()
+        status_holder = []
+        content = []
+
+        async def receive():
+            if request_body:
+                return request_body.pop()
+            # Nothing more to send; the client stays connected until the response ends
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status_holder.append(message['status'])
+                for name, value in message['headers']:
+                    if name.lower() == b'set-cookie':
+                        for morsel in SimpleCookie(value.decode()).values():
+                            self.cookies[morsel.key] = morsel.value
+            elif message['type'] == 'http.response.body':
+                content.append(message.get('body', b''))
+                if not message.get('more_body'):
+                    finished.set()
+
+        await self.application(scope, receive, send)
+        return status_holder[0], b''.join(content)
+
+    async def post(self, path, data):
+        data = dict(data, csrfmiddlewaretoken=self.cookies.get('csrftoken', ''))
+        return await self.request('POST', path, data)
+
+
+class LoadTest:
+    endpoints = ENDPOINTS
+
+    def __init__(self, application, cohort, concurrency=20, think_time=0.0):
+        self.application = application
+        self.cohort = cohort
+        self.concurrency = concurrency
+        self.think_time = think_time
+        self.report = LoadReport(self.endpoints)
+        # A context variable is private to each thread and each asyncio task
+        self._endpoint = contextvars.ContextVar('endpoint', default=self.endpoints[0])
+
+    def timed(self, endpoint, call, expected=(200, 302)):
+        self._endpoint.set(endpoint)
+        started = time.perf_counter()
+        status, content = call()
+        self.report.record(endpoint, time.perf_counter() - started, status in expected)
+        return status, content
+
+    def on_exception(self, sender, request=None, **kwargs):
+        error = sys.exc_info()[1]
+        if is_lock_error(error):
+            self.report.record_lock_error(self._endpoint.get())
+
+    def session(self):
+        return WSGISession(self.application)
+
+    def student(self, username, question_ids):
+        session = self.session()
+        exam_url = reverse('student_take_exam', args=[self.cohort.exam.id])
+        try:
+            login_url = reverse('login')
+            session.request('GET', login_url)
+            self.timed('login', lambda: session.post(
+                login_url, {'username': username, 'password': self.cohort.password}
+            ))
+            self.timed('student_dashboard', lambda: session.request('GET', reverse('student_dashboard')))
+            self.timed('student_take_exam GET', lambda: session.request('GET', exam_url))
+
+            if self.think_time:
+                time.sleep(random.uniform(0, self.think_time))
+
+            answers = {str(question_id): random.choice(OPTION_VALUES) for question_id in question_ids}
+            self.timed('student_take_exam POST', lambda: session.post(exam_url, answers))
+        finally:
+            session.close()
+            connections.close_all()
+
+    def run(self):
+        question_ids = list(get_answer_key(self.cohort.exam.id).question_ids)
+        got_request_exception.connect(self.on_exception)
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                for future in [pool.submit(self.student, username, question_ids)
+                               for username in self.cohort.usernames]:
+                    future.result()
+            self.report.elapsed = time.perf_counter() - started
+        finally:
+            got_request_exception.disconnect(self.on_exception)
+        return self.report
+
+
+class AsyncLoadTest(LoadTest):
+    """
+    The same scenario against the ASGI application, each student an
+    asyncio task, submitting through the async submit view
+    """
+    endpoints = ('login', 'student_dashboard', 'student_take_exam GET', 'student_submit_exam POST')
+
+    async def timed(self, endpoint, call, expected=(200, 302)):
+        self._endpoint.set(endpoint)
+        started = time.perf_counter()
+        status, content = await call()
+        self.report.record(endpoint, time.perf_counter() - started, status in expected)
+        return status, content
+
+    async def student(self, username, question_ids):
+        session = ASGISession(self.application)
+        exam_id = self.cohort.exam.id
+        login_url = reverse('login')
+        await session.request('GET', login_url)
+        await self.timed('login', lambda: session.post(
+            login_url, {'username': username, 'password': self.cohort.password}
+        ))
+        await self.timed('student_dashboard', lambda: session.request('GET', reverse('student_dashboard')))
+        await self.timed('student_take_exam GET', lambda: session.request(
+            'GET', reverse('student_take_exam', args=[exam_id])
+        ))
+
+        if self.think_time:
+            await asyncio.sleep(random.uniform(0, self.think_time))
+
+        answers = {str(question_id): random.choice(OPTION_VALUES) for question_id in question_ids}
+        await self.timed('student_submit_exam POST', lambda: session.post(
+            reverse('student_submit_exam', args=[exam_id]), answers
+        ))
+
+    async def run_students(self, question_ids):
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def limited(username):
+            async with limit:
+                await self.student(username, question_ids)
+
+        await asyncio.gather(*(limited(username) for username in self.cohort.usernames))
+        await sync_to_async(connections.close_all)()
+
+    def run(self):
+        question_ids = list(get_answer_key(self.cohort.exam.id).question_ids)
+        got_request_exception.connect(self.on_exception)
+        try:
+            started = time.perf_counter()
+            asyncio.run(self.run_students(question_ids))
+            self.report.elapsed = time.perf_counter() - started
+        finally:
+            got_request_exception.disconnect(self.on_exception)
+        return self.report
+
+
+class HTTPLoadTest(LoadTest):
+    """
+    The WSGI scenario sent to a running server at ``address`` (host, port)
+    instead of an in-process application
+    """
+    def __init__(self, address, cohort, concurrency=20, think_time=0.0):
+        super().__init__(None, cohort, concurrency, think_time)
+        self.address = address
+
+    def session(self):
+        return HTTPSession(*self.address)
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password, verify_password
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from accounts.loadtest import HOST, ASGISession, WSGISession, percentile
+from accounts.seeding import seed_cohort
+
+from .page_weight import PLAIN_STORAGES
+
+
+class Command(BaseCommand):
+    help = (
+        'Log a seeded cohort in concurrently through the WSGI or ASGI application at one '
+        'or more PBKDF2 work factors, and report logins per second per core'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument(
+            '--concurrency', type=int, default=os.cpu_count(),
+            help='Simultaneous logins (defaults to the number of cores)',
+        )
+        parser.add_argument(
+            '--iterations', type=int, nargs='+',
+            help='PBKDF2 iterations to compare (defaults to PASSWORD_HASH_ITERATIONS)',
+        )
+        parser.add_argument('--interface', choices=['wsgi', 'asgi'], default='wsgi')
+
+    def login_wsgi(self, usernames, password, concurrency):
+        from myproject.wsgi import application
+        url = reverse('login')
+
+        def login(username):
+            session = WSGISession(application)
+            try:
+                session.request('GET', url)
+                started = time.perf_counter()
+                status, content = session.post(url, {'username': username, 'password': password})
+                return time.perf_counter() - started, status == 302
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(login, usernames))
+
+    def login_asgi(self, usernames, password, concurrency):
+        from myproject.asgi import application
+        url = reverse('login')
+
+        async def login(username, limit):
+            async with limit:
+                session = ASGISession(application)
+                await session.request('GET', url)
+                started = time.perf_counter()
+                status, content = await session.post(url, {'username': username, 'password': password})
+                return time.perf_counter() - started, status == 302
+
+        async def run():
+            limit = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*(login(username, limit) for username in usernames))
+
+        return asyncio.run(run())
+
+    def measure(self, iterations, options):
+        # Hashing is what a login costs at this work factor, so it bounds the login rate
+        encoded = make_password('bench-password')
+        started = time.perf_counter()
+        verify_password('bench-password', encoded)
+        hash_time = time.perf_counter() - started
+
+        cohort = seed_cohort(f'benchlogin-{iterations}-{int(time.time())}', options['students'], questions=1)
+        try:
+            login = self.login_asgi if options['interface'] == 'asgi' else self.login_wsgi
+            started = time.perf_counter()
+            results = login(cohort.usernames, cohort.password, options['concurrency'])
+            elapsed = time.perf_counter() - started
+        finally:
+            cohort.delete()
+
+        latencies = sorted(latency for latency, ok in results)
+        cores = min(options['concurrency'], os.cpu_count())
+        rate = len(results) / elapsed
+        return {
+            'iterations': iterations,
+            'hash_ms': hash_time * 1000,
+            'logins': len(results),
+            'errors': sum(not ok for latency, ok in results),
+            'rate': rate,
+            'per_core': rate / cores,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+        }
+
+    def handle(self, *args, **options):
+        rows = []
+        for iterations in options['iterations'] or [settings.PASSWORD_HASH_ITERATIONS]:
+            overrides = {'ALLOWED_HOSTS': [HOST], 'STORAGES': PLAIN_STORAGES, 'PASSWORD_HASH_ITERATIONS': iterations}
+            with override_settings(**overrides):
+                rows.append(self.measure(iterations, options))
+
+        cores = min(options['concurrency'], os.cpu_count())
+        self.stdout.write(
+            f"{options['interface'].upper()}, concurrency {options['concurrency']} on {cores} of {os.cpu_count()} cores\n"
+        )
+        self.stdout.write(f"{'iterations':>11}{'hash ms':>9}{'logins':>8}{'errors':>8}"
+                          f"{'p50 ms':>9}{'p95 ms':>9}{'login/s':>9}{'/s/core':>9}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['iterations']:>11}{row['hash_ms']:>9.1f}{row['logins']:>8}{row['errors']:>8}"
+                f"{row['p50']:>9.1f}{row['p95']:>9.1f}{row['rate']:>9.1f}{row['per_core']:>9.1f}"
+            )
@@ -0,0 +1,126 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from accounts.loadtest import HTTPLoadTest
+from accounts.seeding import seed_cohort
+
+# Server environment for each configuration (see gunicorn.conf.py)
+CONFIGURATIONS = {
+    # What the Procfile used to run: sync workers, a new connection per request
+    'sync-fresh': {'GUNICORN_WORKER_CLASS': 'sync', 'DB_CONN_MAX_AGE': '0'},
+    'gthread-fresh': {'GUNICORN_WORKER_CLASS': 'gthread', 'DB_CONN_MAX_AGE': '0'},
+    'gthread': {'GUNICORN_WORKER_CLASS': 'gthread', 'DB_CONN_MAX_AGE': '600'},
+    'gthread-pool': {'GUNICORN_WORKER_CLASS': 'gthread', 'DB_POOL': '1'},
+    'uvicorn': {'GUNICORN_WORKER_CLASS': 'uvicorn'},
+}
+
+# Pooling is for PostgreSQL only
+POSTGRES_ONLY = {'gthread-pool'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Start gunicorn with each server configuration in turn, send the load test '
+        'scenario to it over HTTP, and compare requests per second'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--configs', nargs='+', choices=list(CONFIGURATIONS),
+            help='Configurations to compare (default: every one the database supports)',
+        )
+        parser.add_argument('--workers', type=int, default=2, help='Gunicorn worker processes')
+        parser.add_argument('--threads', type=int, default=4, help='Threads per gthread worker')
+        parser.add_argument('--students', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=16, help='Simultaneous student sessions')
+        parser.add_argument('--questions', type=int, default=20)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--fast-hashing', action='store_true',
+            help='Hash passwords with 1000 PBKDF2 iterations so login cost does not dominate the run',
+        )
+
+    def server_environment(self, config, options):
+        env = dict(os.environ, **CONFIGURATIONS[config])
+        env['WEB_CONCURRENCY'] = str(options['workers'])
+        env['GUNICORN_THREADS'] = str(options['threads'])
+        env['EXTRA_ALLOWED_HOSTS'] = '127.0.0.1'
+        if connection.vendor == 'sqlite':
+            # The server runs from the project directory; point it at the same file
+            env['DATABASE_URL'] = f"sqlite:///{os.path.abspath(connection.settings_dict['NAME'])}"
+        if options['fast_hashing']:
+            env['PASSWORD_HASH_ITERATIONS'] = '1000'
+        return env
+
+    def wait_until_listening(self, port, server, log):
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError(f'gunicorn exited:\n{log.read().decode(errors="replace")}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'gunicorn did not start listening on port {port}')
+
+    def run_config(self, config, options):
+        port = options['port']
+        cohort = seed_cohort(f'benchserver-{config}-{int(time.time())}', options['students'], options['questions'])
+        log = tempfile.TemporaryFile()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}'],
+            cwd=settings.BASE_DIR, env=self.server_environment(config, options),
+            stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            self.wait_until_listening(port, server, log)
+            report = HTTPLoadTest(('127.0.0.1', port), cohort, concurrency=options['concurrency']).run()
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+            log.close()
+            cohort.delete()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{config}'))
+        report.write(self.stdout)
+        return report
+
+    def handle(self, *args, **options):
+        configs = options['configs'] or [
+            config for config in CONFIGURATIONS
+            if connection.vendor == 'postgresql' or config not in POSTGRES_ONLY
+        ]
+        if connection.vendor != 'postgresql' and POSTGRES_ONLY & set(configs):
+            raise CommandError('Connection pooling needs PostgreSQL (set DATABASE_URL)')
+
+        # The server serves the hashed bundles, which collectstatic builds
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+        overrides = {}
+        if options['fast_hashing']:
+            overrides['PASSWORD_HASH_ITERATIONS'] = 1000
+        with override_settings(**overrides):
+            reports = {config: self.run_config(config, options) for config in configs}
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSummary'))
+        self.stdout.write(f"{'config':<16}{'req/s':>9}{'errors':>8}{'dashboard p95 ms':>18}{'submit p95 ms':>15}")
+        for config, report in reports.items():
+            summaries = report.summaries()
+            requests = sum(row['requests'] for row in summaries.values())
+            errors = sum(row['errors'] for row in summaries.values())
+            self.stdout.write(
+                f"{config:<16}{requests / report.elapsed:>9.1f}{errors:>8}"
+                f"{summaries['student_dashboard']['p95']:>18.1f}{summaries['student_take_exam POST']['p95']:>15.1f}"
+            )
@@ -0,0 +1,73 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import Client
+from django.test.utils import ContextList, override_settings, setup_test_environment, teardown_test_environment
+
+from accounts.seeding import sample_pages, seed_cohort
+
+from .page_weight import PLAIN_STORAGES
+
+
+class Command(BaseCommand):
+    help = (
+        'Render every page template repeatedly, with the context its view produced '
+        'against a seeded cohort, and report the render time. All changes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        # Records the templates and context of each response
+        try:
+            setup_test_environment()
+            instrumented = True
+        except RuntimeError:
+            # Already set up, as under the test runner
+            instrumented = False
+        try:
+            rows = self.measure(options)
+        finally:
+            if instrumented:
+                teardown_test_environment()
+
+        self.stdout.write(f"{'page':<22}{'template':<40}{'p50 ms':>8}{'p95 ms':>8}")
+        for name, template_name, median, p95 in rows:
+            self.stdout.write(f'{name:<22}{template_name:<40}{median * 1000:>8.3f}{p95 * 1000:>8.3f}')
+
+    def measure(self, options):
+        rows = []
+        overrides = {'ALLOWED_HOSTS': ['testserver'], 'STORAGES': PLAIN_STORAGES}
+        with override_settings(**overrides), transaction.atomic():
+            cohort = seed_cohort(f'benchtemplates-{int(time.time())}', options['students'] + 1,
+                                 submitted=options['students'])
+            client = Client()
+            for name, user, url in sample_pages(cohort):
+                client.logout()
+                if user is not None:
+                    client.force_login(user)
+                response = client.get(url)
+                # The page itself, not a partial rendered by the view or included by it
+                index, template_name = next(
+                    (index, template.name) for index, template in enumerate(response.templates)
+                    if '/partials/' not in template.name
+                )
+                contexts = response.context if isinstance(response.context, ContextList) else [response.context]
+                context = contexts[index].flatten()
+                request = response.wsgi_request
+
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    render_to_string(template_name, context, request)
+                    timings.append(time.perf_counter() - started)
+                timings.sort()
+                rows.append((name, template_name, statistics.median(timings), timings[int(len(timings) * 0.95)]))
+
+            transaction.set_rollback(True)
+        return rows
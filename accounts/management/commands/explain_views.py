@@ -0,0 +1,100 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from accounts.seeding import seed_cohort
+
+
+def explain(sql):
+    """
+    Plan lines for a query, and whether any of them is a full table scan
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            lines = [row[-1] for row in cursor.fetchall()]
+            # "SCAN t" reads the whole table; "SCAN t USING INDEX i" walks an index
+            full_scans = [line for line in lines if line.startswith('SCAN') and 'INDEX' not in line]
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN {sql}')
+            lines = [row[0] for row in cursor.fetchall()]
+            full_scans = [line for line in lines if 'Seq Scan' in line]
+        else:
+            raise CommandError(f'EXPLAIN is not supported on {connection.vendor}')
+    return lines, full_scans
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large data set, request every view, and print the EXPLAIN plan of each '
+        'query it issues, flagging full table scans. All changes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cohorts', type=int, default=10, help='Courses, each with a teacher and an exam')
+        parser.add_argument('--students', type=int, default=1000, help='Students per cohort')
+        parser.add_argument('--questions', type=int, default=50)
+
+    def view_urls(self, cohort, student):
+        exam_id = cohort.exam.id
+        return [
+            ('teacher_dashboard', cohort.teacher, reverse('teacher_dashboard')),
+            ('teacher_submissions_feed', cohort.teacher, reverse('teacher_submissions_feed')),
+            ('teacher_create_exam', cohort.teacher, reverse('teacher_create_exam')),
+            ('teacher_exam_detail', cohort.teacher, reverse('teacher_exam_detail', args=[exam_id])),
+            ('teacher_exam_results', cohort.teacher, reverse('teacher_exam_results', args=[exam_id])),
+            ('teacher_export_results', cohort.teacher, reverse('teacher_export_results', args=[exam_id])),
+            ('teacher_student', cohort.teacher, reverse('teacher_student')),
+            ('student_dashboard', student, reverse('student_dashboard')),
+            ('student_history', student, reverse('student_history')),
+            ('student_take_exam', student, reverse('student_take_exam', args=[exam_id])),
+        ]
+
+    def handle(self, *args, **options):
+        flagged = []
+        with override_settings(ALLOWED_HOSTS=['testserver']), transaction.atomic():
+            prefix = f'explain-{int(time.time())}'
+            cohorts = [
+                seed_cohort(
+                    f'{prefix}-{i}', options['students'] + 1,
+                    questions=options['questions'], submitted=options['students'],
+                )
+                for i in range(options['cohorts'])
+            ]
+            # Views are requested as members of one cohort among many
+            cohort = cohorts[0]
+            student = cohort.exam.studentexam_set.select_related('student').first().student
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            client = Client()
+            for name, user, url in self.view_urls(cohort, student):
+                client.force_login(user)
+                with CaptureQueriesContext(connection) as ctx:
+                    response = client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name} ({len(ctx)} queries)'))
+                for query in ctx.captured_queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT'):
+                        continue
+                    lines, full_scans = explain(sql)
+                    self.stdout.write(f'  {sql[:160]}')
+                    for line in lines:
+                        style = self.style.WARNING if line in full_scans else str
+                        self.stdout.write(style(f'      {line}'))
+                    flagged.extend((name, line) for line in full_scans)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nFull table scans'))
+        for name, line in flagged:
+            self.stdout.write(self.style.WARNING(f'  {name}: {line.strip()}'))
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS('  none'))
@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.exports import EXPORT_CHUNK_SIZE, iter_csv, write_parquet
+from accounts.models import Exam
+
+
+class Command(BaseCommand):
+    help = "Export an exam's results as CSV or Parquet without loading them into memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_id', type=int)
+        parser.add_argument('path', help="Output file ('-' writes CSV to stdout)")
+        parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not Exam.objects.filter(id=options['exam_id']).exists():
+            raise CommandError(f"Exam {options['exam_id']} does not exist")
+
+        if options['format'] == 'parquet':
+            try:
+                written = write_parquet(options['exam_id'], options['path'], options['chunk_size'])
+            except ImportError:
+                raise CommandError('Parquet export needs pyarrow (pip install pyarrow)')
+            self.stderr.write(f"Wrote {written} rows to {options['path']}")
+            return
+
+        lines = iter_csv(options['exam_id'], options['chunk_size'])
+        if options['path'] == '-':
+            sys.stdout.writelines(lines)
+            return
+        with open(options['path'], 'w', newline='') as handle:
+            handle.writelines(lines)
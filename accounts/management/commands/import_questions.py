@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importers import detect_format, import_questions
+from accounts.models import Exam
+
+
+class Command(BaseCommand):
+    help = 'Bulk import questions into an exam from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+
+    def handle(self, *args, **options):
+        try:
+            exam = Exam.objects.get(id=options['exam_id'])
+        except Exam.DoesNotExist:
+            raise CommandError(f"Exam {options['exam_id']} does not exist")
+
+        try:
+            fmt = options['format'] or detect_format(options['path'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        with open(options['path'], 'rb') as stream:
+            report = import_questions(exam, stream, fmt)
+
+        for line, message in report.errors:
+            self.stderr.write(f'Line {line}: {message}')
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'... and {report.error_count - len(report.errors)} more errors')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} questions into "{exam.name}" ({report.error_count} rows skipped)'
+        ))
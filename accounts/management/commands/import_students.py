@@ -0,0 +1,45 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.importers import STUDENT_BATCH_SIZE, import_students
+
+
+class Command(BaseCommand):
+    help = 'Bulk import students from a CSV with username, email, password, course and roll_number columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Processes used to hash passwords (1 hashes in this process)',
+        )
+        parser.add_argument(
+            '--require-reset', action='store_true',
+            help='Skip hashing and give every account an unusable password; students set '
+                 'their own through "Forgot password?" on the login page',
+        )
+        parser.add_argument('--batch-size', type=int, default=STUDENT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with open(options['path'], 'rb') as stream:
+            report = import_students(
+                stream,
+                workers=options['workers'],
+                require_reset=options['require_reset'],
+                batch_size=options['batch_size'],
+            )
+        elapsed = time.perf_counter() - started
+
+        for line, message in report.errors:
+            self.stderr.write(f'Line {line}: {message}')
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'... and {report.error_count - len(report.errors)} more errors')
+
+        rate = report.created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} students in {elapsed:.1f}s ({rate:.0f} rows/s, '
+            f'{report.error_count} rows skipped)'
+        ))
@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from accounts.loadtest import HOST, AsyncLoadTest, LoadTest
+from accounts.seeding import seed_cohort
+
+from .page_weight import PLAIN_STORAGES
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate a cohort logging in, opening an exam and submitting it concurrently '
+        'through the WSGI or ASGI application, and report latency per endpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=20, help='Simultaneous student sessions')
+        parser.add_argument('--questions', type=int, default=20)
+        parser.add_argument(
+            '--think-time', type=float, default=0,
+            help='Maximum random pause in seconds between opening and submitting the exam',
+        )
+        parser.add_argument(
+            '--fast-hashing', action='store_true',
+            help='Use a cheap password hasher so login cost does not dominate the run',
+        )
+        parser.add_argument(
+            '--interface', choices=['wsgi', 'asgi', 'both'], default='wsgi',
+            help='wsgi submits through the sync view, asgi through the async one; '
+                 'both runs each against its own cohort and compares submit throughput',
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data afterwards')
+
+    def run_interface(self, interface, options):
+        if interface == 'asgi':
+            from myproject.asgi import application
+            load_test = AsyncLoadTest
+        else:
+            from myproject.wsgi import application
+            load_test = LoadTest
+
+        prefix = f'loadtest-{interface}-{int(time.time())}'
+        cohort = seed_cohort(prefix, options['students'], options['questions'])
+        self.stdout.write(
+            f"Seeded {options['students']} students and {options['questions']} questions ({prefix})"
+        )
+        try:
+            report = load_test(
+                application, cohort,
+                concurrency=options['concurrency'],
+                think_time=options['think_time'],
+            ).run()
+        finally:
+            if not options['keep']:
+                cohort.delete()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{interface.upper()}'))
+        report.write(self.stdout)
+        return report
+
+    def handle(self, *args, **options):
+        # Pages render without collectstatic having built the manifest
+        overrides = {'ALLOWED_HOSTS': [HOST], 'STORAGES': PLAIN_STORAGES}
+        if options['fast_hashing']:
+            overrides['PASSWORD_HASHERS'] = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+        interfaces = ['wsgi', 'asgi'] if options['interface'] == 'both' else [options['interface']]
+        with override_settings(**overrides):
+            reports = {interface: self.run_interface(interface, options) for interface in interfaces}
+
+        if len(reports) == 2:
+            submissions = {
+                'sync': reports['wsgi'].summaries()['student_take_exam POST'],
+                'async': reports['asgi'].summaries()['student_submit_exam POST'],
+            }
+            self.stdout.write(self.style.MIGRATE_HEADING('\nSubmission (sync view vs async view)'))
+            for label, row in submissions.items():
+                self.stdout.write(
+                    f"{label:<8}{row['throughput']:>9.1f} req/s   p50 {row['p50']:.1f} ms   "
+                    f"p95 {row['p95']:.1f} ms   errors {row['errors'] + row['lock_errors']}"
+                )
@@ -0,0 +1,84 @@
+import gzip
+import re
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from accounts.seeding import sample_pages, seed_cohort
+
+STYLESHEET = re.compile(r'<link rel="stylesheet" href="([^"]+)"')
+
+# Static files are looked up unhashed, straight from the finders
+PLAIN_STORAGES = dict(settings.STORAGES, staticfiles={
+    'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+})
+
+
+def gzipped_size(content):
+    return len(gzip.compress(content, compresslevel=6))
+
+
+def stylesheet_sizes(html):
+    """
+    Raw and gzipped size of the local stylesheets a page links to
+    """
+    raw = compressed = 0
+    for href in STYLESHEET.findall(html):
+        if not href.startswith(settings.STATIC_URL) and not href.startswith('/' + settings.STATIC_URL):
+            continue
+        path = finders.find(href.split(settings.STATIC_URL, 1)[1])
+        with open(path, 'rb') as stylesheet:
+            content = stylesheet.read()
+        raw += len(content)
+        compressed += gzipped_size(content)
+    return raw, compressed
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the HTML size, linked stylesheet size and render time of every page '
+        'against a seeded cohort. All changes are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per page; the median time is shown')
+
+    def handle(self, *args, **options):
+        rows = []
+        overrides = {'ALLOWED_HOSTS': ['testserver'], 'STORAGES': PLAIN_STORAGES}
+        with override_settings(**overrides), transaction.atomic():
+            cohort = seed_cohort(f'pageweight-{int(time.time())}', options['students'] + 1,
+                                 submitted=options['students'])
+            client = Client()
+            for name, user, url in sample_pages(cohort):
+                client.logout()
+                if user is not None:
+                    client.force_login(user)
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - started)
+                html = response.content
+                css, css_gzipped = stylesheet_sizes(html.decode())
+                rows.append((name, len(html), gzipped_size(html), css, css_gzipped, statistics.median(timings)))
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'page':<22}{'html':>8}{'html gz':>9}{'css':>8}{'css gz':>8}{'ms':>8}"
+        )
+        for name, html, html_gzipped, css, css_gzipped, elapsed in rows:
+            self.stdout.write(
+                f'{name:<22}{html:>8}{html_gzipped:>9}{css:>8}{css_gzipped:>8}{elapsed * 1000:>8.1f}'
+            )
+        self.stdout.write(
+            '\nhtml is sent on every view; css only on the first, then served from the browser cache'
+        )
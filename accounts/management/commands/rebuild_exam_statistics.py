@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import Exam, ExamStatistics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-exam statistics from submitted StudentExam rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_ids', nargs='*', type=int, help='Exams to rebuild (default: all)')
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.order_by('id')
+        if options['exam_ids']:
+            exams = exams.filter(id__in=options['exam_ids'])
+
+        rebuilt = 0
+        for exam_id in exams.values_list('id', flat=True).iterator():
+            stats = ExamStatistics.rebuild(exam_id)
+            rebuilt += 1
+            self.stdout.write(f'Exam {exam_id}: {stats.count} submissions')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt statistics for {rebuilt} exam(s)'))
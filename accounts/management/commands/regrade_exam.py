@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Exam
+from accounts.regrading import REGRADE_BATCH_SIZE, regrade_exam
+
+
+class Command(BaseCommand):
+    help = 'Recompute the scores of an exam from the stored responses against its current answer key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('exam_id', type=int)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+        parser.add_argument('--batch-size', type=int, default=REGRADE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not Exam.objects.filter(id=options['exam_id']).exists():
+            raise CommandError(f"Exam {options['exam_id']} does not exist")
+
+        started = time.perf_counter()
+        try:
+            report = regrade_exam(options['exam_id'], dry_run=options['dry_run'], batch_size=options['batch_size'])
+        except ValueError as error:
+            raise CommandError(str(error))
+        elapsed = time.perf_counter() - started
+
+        if report.skipped:
+            self.stderr.write(f'{report.skipped} attempts have no usable stored responses and were left alone')
+        if report.partial:
+            self.stderr.write(
+                f'{report.partial} attempts predate questions added since and were graded on the questions they were shown'
+            )
+        if report.dry_run:
+            self.stdout.write(f'Dry run: {report.changed} of {report.attempts} scores would change')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Regraded {report.attempts} attempts in {elapsed:.2f}s: {report.changed} scores changed, '
+                f'{report.results_updated} results updated'
+            ))
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts.writebehind import replay
+
+
+class Command(BaseCommand):
+    help = (
+        'Write submissions left in the write-behind journal by a stopped or crashed '
+        'process to the database. Segments held by running processes are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journal-dir', default=None, help='Default: EXAM_JOURNAL_DIR')
+
+    def handle(self, *args, **options):
+        directory = options['journal_dir'] or str(settings.EXAM_JOURNAL_DIR)
+        applied = replay(directory)
+        self.stdout.write(self.style.SUCCESS(f'Replayed {applied} submission(s) from {directory}'))
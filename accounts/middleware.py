@@ -0,0 +1,55 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .models import Profile
+
+
+def get_profile(user):
+    """
+    The user's profile, creating a student profile on first use. With
+    ProfileBackend the profile came with the user, so this is free.
+    """
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        # Accounts made outside the app (e.g. createsuperuser) start as students
+        profile, created = Profile.objects.get_or_create(
+            user=user, defaults={'role': 'student', 'approved': True}
+        )
+        user.profile = profile
+        return profile
+
+
+async def aget_profile(user):
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        profile, created = await Profile.objects.aget_or_create(
+            user=user, defaults={'role': 'student', 'approved': True}
+        )
+        user.profile = profile
+        return profile
+
+
+class UserContextMiddleware:
+    """
+    Set ``request.profile`` (None when anonymous), resolved lazily from
+    ``request.user``. Async views should await ``aget_profile(await
+    request.auser())`` instead.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: get_profile(request.user))
+        # Under ASGI this hands back the coroutine for the handler to await
+        return self.get_response(request)
@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-18 13:27
+
+import accounts.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_statistics(apps, schema_editor):
+    Exam = apps.get_model('accounts', 'Exam')
+    ExamStatistics = apps.get_model('accounts', 'ExamStatistics')
+    StudentExam = apps.get_model('accounts', 'StudentExam')
+
+    for exam_id in Exam.objects.values_list('id', flat=True).iterator():
+        scores = list(StudentExam.objects.filter(
+            exam_id=exam_id, is_submitted=True, score__isnull=False
+        ).values_list('score', flat=True))
+        histogram = [0] * 10
+        for score in scores:
+            histogram[min(max(int(score // 10), 0), 9)] += 1
+
+        ExamStatistics.objects.create(
+            exam_id=exam_id,
+            count=len(scores),
+            total=sum(scores),
+            total_squares=sum(score * score for score in scores),
+            min_score=min(scores, default=None),
+            max_score=max(scores, default=None),
+            pass_count=sum(1 for score in scores if score >= 60),
+            histogram=histogram,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0010_merge_20260201_2353'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('total_squares', models.FloatField(default=0)),
+                ('min_score', models.FloatField(blank=True, null=True)),
+                ('max_score', models.FloatField(blank=True, null=True)),
+                ('pass_count', models.PositiveIntegerField(default=0)),
+                ('histogram', models.JSONField(default=accounts.models.empty_histogram)),
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='statistics', to='accounts.exam')),
+            ],
+            options={
+                'verbose_name_plural': 'exam statistics',
+            },
+        ),
+        migrations.RunPython(backfill_statistics, migrations.RunPython.noop),
+    ]
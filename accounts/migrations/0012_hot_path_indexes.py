@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 13:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_examstatistics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['subject', 'is_active'], name='exam_subject_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentexam',
+            index=models.Index(fields=['exam', 'is_submitted', 'score'], name='studentexam_exam_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentexam',
+            index=models.Index(fields=['student', 'is_submitted'], name='studentexam_student_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 13:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerDraft',
+            fields=[
+                ('student_exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='draft', serialize=False, to='accounts.studentexam')),
+                ('answers', models.BinaryField(default=b'')),
+                ('key_version', models.BigIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0013_answerdraft'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentexam',
+            name='key_version',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentexam',
+            name='responses',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
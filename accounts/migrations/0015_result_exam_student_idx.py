@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 14:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_studentexam_responses'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['exam', 'student'], name='result_exam_student_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-18 15:02
+
+import accounts.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_result_exam_student_idx'),
+    ]
+
+    operations = [
+        # Added without a default first, so existing attempts are left
+        # unshuffled instead of all sharing one seed
+        migrations.AddField(
+            model_name='studentexam',
+            name='paper_seed',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='studentexam',
+            name='paper_seed',
+            field=models.BigIntegerField(blank=True, default=accounts.models.new_paper_seed, editable=False, null=True),
+        ),
+    ]
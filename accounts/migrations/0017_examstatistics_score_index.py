@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 15:40
+
+import accounts.ranking
+from django.db import migrations, models
+
+
+def backfill_score_index(apps, schema_editor):
+    ExamStatistics = apps.get_model('accounts', 'ExamStatistics')
+    StudentExam = apps.get_model('accounts', 'StudentExam')
+
+    for stats in ExamStatistics.objects.only('id', 'exam_id').iterator():
+        scores = StudentExam.objects.filter(
+            exam_id=stats.exam_id, is_submitted=True, score__isnull=False
+        ).values_list('score', flat=True)
+        index = accounts.ranking.ScoreIndex.from_scores(scores.iterator())
+        ExamStatistics.objects.filter(pk=stats.pk).update(score_index=index.pack())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0016_studentexam_paper_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examstatistics',
+            name='score_index',
+            field=models.BinaryField(default=accounts.ranking.empty_score_index),
+        ),
+        migrations.RunPython(backfill_score_index, migrations.RunPython.noop),
+    ]
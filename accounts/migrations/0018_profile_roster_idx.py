@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 14:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_examstatistics_score_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['course', 'roll_number', 'id'], name='profile_roster_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_profile_roster_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='exam',
+            name='end_time',
+        ),
+        migrations.RemoveField(
+            model_name='exam',
+            name='start_time',
+        ),
+        migrations.RemoveField(
+            model_name='studentexam',
+            name='end_time',
+        ),
+        migrations.RemoveField(
+            model_name='studentexam',
+            name='start_time',
+        ),
+    ]
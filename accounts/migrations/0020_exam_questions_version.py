@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_remove_exam_times'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='questions_version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
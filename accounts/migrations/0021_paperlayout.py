@@ -0,0 +1,72 @@
+# Generated by Django 6.0 on 2026-10-18 16:00
+
+import hashlib
+import sys
+from array import array
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def ids_to_bytes(question_ids):
+    ids = array('q', question_ids)
+    if sys.byteorder == 'big':
+        ids.byteswap()
+    return ids.tobytes()
+
+
+def backfill_layouts(apps, schema_editor):
+    """
+    Store the current layout of every exam and point the responses and
+    drafts saved before layouts were kept at it, where their length
+    matches. Their old key versions only named a cache entry, so this is
+    the best that can be recovered; the rest stay unreadable, as before.
+    """
+    Exam = apps.get_model('accounts', 'Exam')
+    PaperLayout = apps.get_model('accounts', 'PaperLayout')
+    Question = apps.get_model('accounts', 'Question')
+    StudentExam = apps.get_model('accounts', 'StudentExam')
+    AnswerDraft = apps.get_model('accounts', 'AnswerDraft')
+
+    for exam_id in Exam.objects.values_list('id', flat=True).iterator():
+        question_ids = list(Question.objects.filter(exam_id=exam_id).order_by('id').values_list('id', flat=True))
+        if not question_ids:
+            continue
+        data = ids_to_bytes(question_ids)
+        digest = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little') >> 1
+        PaperLayout.objects.get_or_create(exam_id=exam_id, digest=digest, defaults={'question_ids': data})
+
+        attempts = StudentExam.objects.filter(exam_id=exam_id, responses__isnull=False)
+        matching = [pk for pk, responses in attempts.values_list('id', 'responses').iterator()
+                    if len(responses) == len(question_ids)]
+        for start in range(0, len(matching), 1000):
+            StudentExam.objects.filter(id__in=matching[start:start + 1000]).update(key_version=digest)
+
+        drafts = AnswerDraft.objects.filter(student_exam__exam_id=exam_id)
+        matching = [pk for pk, answers in drafts.values_list('pk', 'answers').iterator()
+                    if len(answers) == len(question_ids)]
+        for start in range(0, len(matching), 1000):
+            AnswerDraft.objects.filter(pk__in=matching[start:start + 1000]).update(key_version=digest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_exam_questions_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaperLayout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.BigIntegerField()),
+                ('question_ids', models.BinaryField()),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='layouts', to='accounts.exam')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('exam', 'digest'), name='paperlayout_exam_digest_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_layouts, migrations.RunPython.noop),
+    ]
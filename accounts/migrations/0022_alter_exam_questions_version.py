@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_paperlayout'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exam',
+            name='questions_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
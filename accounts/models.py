@@ -1,7 +1,12 @@
-from django.db import models
+import math
+import secrets
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django import forms
 
+from .ranking import ScoreIndex, empty_score_index, score_step
+
 
 # ===== Profile for role management =====
 class Profile(models.Model):
@@ -17,6 +22,11 @@ class Profile(models.Model):
     course = models.ForeignKey('Course', on_delete=models.SET_NULL, blank=True, null=True)
     is_teacher = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # the teacher's student roster, keyset-paginated in this order
+            models.Index(fields=['course', 'roll_number', 'id'], name='profile_roster_idx'),
+        ]
 
     def __str__(self):
         return self.user.username
@@ -50,7 +60,27 @@ class Exam(models.Model):
     allow_calculator = models.BooleanField(default=False)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, default=1)
     subject = models.ForeignKey('Subject', on_delete=models.CASCADE, )
+    # Bumped with every change to the exam's questions, in the same
+    # transaction; everything cached from the questions is keyed by it.
+    # Only bump_exam_version writes it (see save()).
+    questions_version = models.BigIntegerField(default=0, editable=False)
     
+    class Meta:
+        indexes = [
+            # student dashboard: active exams for a course (joined through subject)
+            models.Index(fields=['subject', 'is_active'], name='exam_subject_active_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # An instance loaded before a question changed holds an old version;
+        # writing it back would serve the stale cached key and paper again
+        if not self._state.adding:
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            kwargs['update_fields'] = [name for name in update_fields if name != 'questions_version']
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.name} - {self.subject.name}"
 
@@ -69,11 +99,40 @@ class Question(models.Model):
         return self.question_text
 
 
+# ===== Paper layouts =====
+class PaperLayout(models.Model):
+    """
+    An order of an exam's questions that answers were packed in (see
+    AnswerKey.pack), found by ``digest``, a hash of the ordered ids.
+    Kept so stored responses and drafts can be read back whatever
+    happened to the questions or the cache since.
+    """
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='layouts')
+    digest = models.BigIntegerField()
+    # Question ids as 8-byte little-endian integers
+    question_ids = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['exam', 'digest'], name='paperlayout_exam_digest_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Layout {self.digest} of {self.exam}"
+
+
 # ===== Track student exams =====
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+# Minimum percentage score counted as a pass
+PASS_MARK = 60
+
+
+def new_paper_seed():
+    return secrets.randbits(63)
+
 
 class StudentExam(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -81,26 +140,52 @@ class StudentExam(models.Model):
 
     score = models.FloatField(blank=True, null=True)
     is_submitted = models.BooleanField(default=False)
+    # Submitted answers, one byte per question in the order of the
+    # PaperLayout whose digest is ``key_version`` (see AnswerKey.pack), for
+    # item analysis and regrading
+    responses = models.BinaryField(blank=True, null=True)
+    key_version = models.BigIntegerField(blank=True, null=True)
+    # Order of this attempt's questions and options (see shuffling.py);
+    # attempts started before shuffling have none and keep the plain order
+    paper_seed = models.BigIntegerField(blank=True, null=True, default=new_paper_seed, editable=False)
 
     # when student actually starts the exam
     
 
     class Meta:
         unique_together = ('student', 'exam')  # 🔒 one attempt only
+        indexes = [
+            # submissions per exam, ranked by score (results, dashboards, rank)
+            models.Index(fields=['exam', 'is_submitted', 'score'], name='studentexam_exam_score_idx'),
+            # a student's completed exams (dashboard, history)
+            models.Index(fields=['student', 'is_submitted'], name='studentexam_student_idx'),
+        ]
 
     def start_exam(self):
         
         
             self.save()
 
-    def submit_exam(self, score):
+    def submit_exam(self, score, responses=None, key_version=None):
         """
-        Call this on final submission or auto-submit
+        Call this on final submission or auto-submit. The attempt is
+        claimed with a conditional UPDATE, so of two concurrent submissions
+        only one succeeds; returns False if it was already submitted.
         """
-        self.score = score
-        self.is_submitted = True
-        
-        self.save()
+        with transaction.atomic():
+            claimed = StudentExam.objects.filter(pk=self.pk, is_submitted=False).update(
+                score=score, is_submitted=True, responses=responses, key_version=key_version
+            )
+            if not claimed:
+                return False
+            AnswerDraft.objects.filter(student_exam_id=self.pk).delete()
+
+            self.score = score
+            self.is_submitted = True
+            self.responses = responses
+            self.key_version = key_version
+            ExamStatistics.record(self.exam_id, [score])
+        return True
 
     def is_active_now(self):
         """
@@ -125,15 +210,169 @@ class StudentExam(models.Model):
 
 #======== trackresult=======
 
+class AnswerDraft(models.Model):
+    """
+    In-progress answers of an attempt, autosaved while the student works
+    and removed once it is submitted. ``answers`` packs one byte per
+    question in the order of the PaperLayout whose digest is
+    ``key_version`` (see AnswerKey.pack).
+    """
+    student_exam = models.OneToOneField(
+        StudentExam, on_delete=models.CASCADE, primary_key=True, related_name='draft'
+    )
+    answers = models.BinaryField(default=b'')
+    key_version = models.BigIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Draft of {self.student_exam}"
+
+
 class Result(models.Model):
     student = models.ForeignKey(Profile, on_delete=models.CASCADE)
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE)
     score = models.FloatField(default=0)
     attempted_on = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # a student's result for an exam (regrading)
+            models.Index(fields=['exam', 'student'], name='result_exam_student_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.user.username} - {self.exam.name} - {self.score}"
-    
+
+
+#======== exam statistics =======
+
+# Scores are bucketed in steps of 10 (0-9.9, 10-19.9, ..., 90-100)
+HISTOGRAM_BUCKETS = 10
+
+
+def empty_histogram():
+    return [0] * HISTOGRAM_BUCKETS
+
+
+class ExamStatistics(models.Model):
+    """
+    Running totals for an exam's submitted scores, updated on every
+    submission so results pages never have to rescan StudentExam.
+    """
+    exam = models.OneToOneField(Exam, on_delete=models.CASCADE, related_name='statistics')
+    count = models.PositiveIntegerField(default=0)
+    total = models.FloatField(default=0)
+    total_squares = models.FloatField(default=0)
+    min_score = models.FloatField(blank=True, null=True)
+    max_score = models.FloatField(blank=True, null=True)
+    pass_count = models.PositiveIntegerField(default=0)
+    histogram = models.JSONField(default=empty_histogram)
+    # Fenwick tree of every submitted score, for rank lookups (see ranking.py)
+    score_index = models.BinaryField(default=empty_score_index)
+
+    class Meta:
+        verbose_name_plural = 'exam statistics'
+
+    def add_scores(self, scores):
+        index = ScoreIndex(self.score_index)
+        for score in scores:
+            index.add(score)
+            self.count += 1
+            self.total += score
+            self.total_squares += score * score
+            self.min_score = score if self.min_score is None else min(self.min_score, score)
+            self.max_score = score if self.max_score is None else max(self.max_score, score)
+            if score >= PASS_MARK:
+                self.pass_count += 1
+            bucket = min(max(int(score // 10), 0), HISTOGRAM_BUCKETS - 1)
+            self.histogram[bucket] += 1
+        self.score_index = index.pack()
+
+    @classmethod
+    def record(cls, exam_id, scores):
+        """
+        Add newly submitted scores, locking the row so concurrent
+        submissions for the same exam cannot lose updates.
+        """
+        with transaction.atomic():
+            stats, created = cls.objects.select_for_update().get_or_create(exam_id=exam_id)
+            stats.add_scores(scores)
+            stats.save()
+        return stats
+
+    @classmethod
+    def rebuild(cls, exam_id):
+        """
+        Recompute the statistics for an exam from its StudentExam rows
+        """
+        scores = StudentExam.objects.filter(
+            exam_id=exam_id, is_submitted=True, score__isnull=False
+        ).values_list('score', flat=True)
+
+        with transaction.atomic():
+            stats, created = cls.objects.select_for_update().get_or_create(exam_id=exam_id)
+            stats.reset()
+            stats.add_scores(scores.iterator())
+            stats.save()
+        return stats
+
+    def standing(self, score):
+        """
+        Rank of ``score`` among the exam's submissions (1 for the best,
+        ties sharing a rank) and its percentile rank: the share of scores
+        below it, counting ties as half
+        """
+        index = ScoreIndex(self.score_index)
+        step = score_step(score)
+        at_most = index.at_most(step)
+        below = index.at_most(step - 1) if step else 0
+        return {
+            'rank': self.count - at_most + 1,
+            'out_of': self.count,
+            'percentile': (below + (at_most - below) / 2) / self.count * 100 if self.count else 0,
+        }
+
+    def reset(self):
+        self.count = 0
+        self.total = 0
+        self.total_squares = 0
+        self.min_score = None
+        self.max_score = None
+        self.pass_count = 0
+        self.histogram = empty_histogram()
+        self.score_index = empty_score_index()
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    @property
+    def stddev(self):
+        if not self.count:
+            return 0
+        return math.sqrt(max(self.total_squares / self.count - self.mean ** 2, 0))
+
+    @property
+    def fail_count(self):
+        return self.count - self.pass_count
+
+    @property
+    def pass_percentage(self):
+        return round(self.pass_count / self.count * 100, 1) if self.count else 0
+
+    def as_dict(self):
+        return {
+            'total_attempts': self.count,
+            'average_score': round(self.mean, 1),
+            'highest_score': self.max_score or 0,
+            'lowest_score': self.min_score or 0,
+            'pass_count': self.pass_count,
+            'fail_count': self.fail_count,
+            'pass_percentage': self.pass_percentage,
+        }
+
+    def __str__(self):
+        return f"{self.exam.name} - {self.count} attempts"
 
 
 
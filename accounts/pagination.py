@@ -0,0 +1,154 @@
+import base64
+import binascii
+import json
+from operator import attrgetter
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+# Values a cursor may hold; anything else has been tampered with
+CURSOR_TYPES = (str, int, float, bool, type(None))
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Values encoded by encode_cursor, or None if the cursor is missing
+    or has been tampered with
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def _field(model, name):
+    field = None
+    for part in name.split('__'):
+        field = model._meta.get_field(part)
+        model = field.related_model
+    return field
+
+
+def _nullable(model, name):
+    return _field(model, name).null
+
+
+def cursor_values(queryset, ordering, cursor):
+    """
+    The values of ``cursor`` converted for the fields of ``ordering``, or
+    None if it is missing or does not fit them, so a tampered cursor
+    starts again from the first page instead of failing in the query
+    """
+    values = decode_cursor(cursor)
+    if values is None or len(values) != len(ordering):
+        return None
+    converted = []
+    for field, value in zip(ordering, values):
+        if not isinstance(value, CURSOR_TYPES):
+            return None
+        field = _field(queryset.model, field.lstrip('-'))
+        if value is None:
+            if not field.null:
+                return None
+            converted.append(None)
+            continue
+        try:
+            converted.append(field.to_python(value))
+        except (ValidationError, TypeError, ValueError):
+            return None
+    return converted
+
+
+def _after(queryset, ordering, values):
+    """
+    Rows that sort strictly after ``values`` under ``ordering``, as one
+    condition per key column, nearest first: (a = x AND b = y AND c > z),
+    (a = x AND b > y), (a > x). Each is a single index range, and every
+    row matching one sorts before every row matching the next.
+    NULLs sort where the database puts them: last in ascending order
+    when it treats them as largest (PostgreSQL), first otherwise.
+    """
+    nulls_largest = connections[queryset.db].features.nulls_order_largest
+    ranges = []
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        nulls_last = nulls_largest != descending
+        if value is None:
+            # Only non-NULL rows can follow a NULL, and only if NULLs come first
+            if not nulls_last:
+                ranges.append(equal & Q(**{f'{name}__isnull': False}))
+            equal &= Q(**{f'{name}__isnull': True})
+            continue
+        greater = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+        if nulls_last and _nullable(queryset.model, name):
+            greater |= Q(**{f'{name}__isnull': True})
+        ranges.append(equal & greater)
+        equal &= Q(**{name: value})
+    return ranges[::-1]
+
+
+def keyset_paginate(queryset, ordering, cursor=None, size=20):
+    """
+    One page of ``queryset`` ordered by ``ordering`` (field names, '-' for
+    descending; the last one must be unique and not null), starting after
+    ``cursor``.
+    Returns the rows and the cursor for the next page, or None at the end.
+
+    Unlike OFFSET pagination every page is an index range scan, so the
+    cost stays flat no matter how deep the reader scrolls. With several
+    key columns the ranges after the cursor are read one at a time, since
+    an OR of them would be scanned from the start of the first column's
+    value.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = cursor_values(queryset, ordering, cursor)
+    if values is not None:
+        rows = []
+        for condition in _after(queryset, ordering, values):
+            rows += queryset.filter(condition)[:size + 1 - len(rows)]
+            if len(rows) > size:
+                break
+    else:
+        rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+
+    rows = rows[:size]
+    return rows, _cursor_after(rows[-1], ordering)
+
+
+def _cursor_after(row, ordering):
+    getters = [attrgetter(field.lstrip('-').replace('__', '.')) for field in ordering]
+    return encode_cursor([getter(row) for getter in getters])
+
+
+def keyset_paginate_any(queryset, conditions, ordering, cursor=None, size=20):
+    """
+    keyset_paginate over the rows of ``queryset`` matching any of
+    ``conditions``. An OR of conditions on different indexes would have
+    to scan the whole ordering, so each condition is paged on its own and
+    the page is cut from the rows they found together.
+    """
+    ids = set()
+    more = False
+    for condition in conditions:
+        rows, next_cursor = keyset_paginate(queryset.filter(condition), ordering, cursor, size)
+        ids.update(row.pk for row in rows)
+        more = more or next_cursor is not None
+
+    rows = list(queryset.filter(pk__in=ids).order_by(*ordering)[:size + 1])
+    if len(rows) <= size and not more:
+        return rows, None
+
+    rows = rows[:size]
+    return rows, _cursor_after(rows[-1], ordering)
@@ -0,0 +1,146 @@
+"""
+Regrading: recompute every score of an exam from the packed responses
+kept on each attempt (StudentExam.responses), after its answer key was
+corrected.
+"""
+import numpy as np
+from django.db import transaction
+
+from .analysis import RESPONSE_CHUNK_SIZE, laid_out
+from .grading import get_answer_key
+from .models import ExamStatistics, Profile, Result, StudentExam
+
+# Rows matched per UPDATE statement
+REGRADE_BATCH_SIZE = 1000
+
+
+class RegradeReport:
+    def __init__(self, exam_id, dry_run):
+        self.exam_id = exam_id
+        self.dry_run = dry_run
+        self.attempts = 0
+        self.changed = 0
+        # Attempts submitted without responses, before their layout was
+        # kept, or shown none of the current questions, which cannot be
+        # regraded
+        self.skipped = 0
+        # Attempts made before questions were added, graded only on the
+        # questions they were shown
+        self.partial = 0
+        self.results_updated = 0
+
+
+def percent_scores(choices, correct, shown=None):
+    """
+    Percentage score of every row of a students x questions matrix of
+    chosen options, graded like AnswerKey.grade. With ``shown``, a boolean
+    matrix of the same shape, each row is graded only on its shown questions.
+    """
+    questions = len(correct)
+    if not questions:
+        return np.zeros(len(choices))
+    correct = np.asarray(correct, dtype=np.int16)
+    right = (choices == (correct + 1)) & (correct >= 0)
+    if shown is None:
+        return right.sum(axis=1, dtype=np.int64) / questions * 100
+    return (right & shown).sum(axis=1, dtype=np.int64) / shown.sum(axis=1, dtype=np.int64) * 100
+
+
+def shown_questions(answer_key, layout, layouts):
+    """
+    Which questions of ``answer_key`` were in the stored layout ``layout``,
+    one byte per question; ``layouts`` is the memo filled by laid_out
+    """
+    if layout == answer_key.layout:
+        return b'\1' * len(answer_key)
+    return np.isin(answer_key.question_ids, layouts[layout]).astype(np.uint8).tobytes()
+
+
+def chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size].tolist()
+
+
+def regrade_exam(exam_id, dry_run=False, batch_size=REGRADE_BATCH_SIZE):
+    """
+    Grade every submitted attempt of an exam against its current answer
+    key and write back the scores that changed, with their Result rows and
+    the exam statistics, in one transaction. An attempt is graded only on
+    the current questions its stored layout had, so questions added since
+    do not count against it. With ``dry_run`` nothing is written, but the
+    report still counts what would change. Raises ValueError if the exam
+    has no questions, rather than scoring every attempt 0.
+    """
+    report = RegradeReport(exam_id, dry_run)
+
+    with transaction.atomic():
+        answer_key = get_answer_key(exam_id)
+        if not len(answer_key):
+            raise ValueError('This exam has no questions to regrade against.')
+        attempts = StudentExam.objects.filter(exam_id=exam_id, is_submitted=True)
+        if not dry_run:
+            # Lock the submitted attempts until the new scores are in
+            attempts = attempts.select_for_update()
+
+        ids, students, old_scores, rows, shown, stale, moved = [], [], [], [], [], [], []
+        layouts = {}
+        masks = {}
+        rows_in = attempts.values_list('id', 'student_id', 'score', 'responses', 'key_version')
+        for pk, student_id, score, stored, layout in rows_in.iterator(chunk_size=RESPONSE_CHUNK_SIZE):
+            report.attempts += 1
+            packed = laid_out(answer_key, stored, layout, layouts) if stored is not None else None
+            if packed is not None and layout not in masks:
+                masks[layout] = shown_questions(answer_key, layout, layouts)
+            if packed is None or not any(masks[layout]):
+                report.skipped += 1
+                continue
+            complete = all(masks[layout])
+            report.partial += not complete
+            ids.append(pk)
+            students.append(student_id)
+            old_scores.append(np.nan if score is None else score)
+            rows.append(packed)
+            shown.append(masks[layout])
+            # Responses are only moved to the current layout when that
+            # loses nothing: an unanswered byte there would count as shown
+            stale.append(complete and layout != answer_key.layout)
+            moved.append(complete and packed != bytes(stored))
+
+        choices = np.frombuffer(b''.join(rows), dtype=np.uint8).reshape(len(rows), len(answer_key))
+        shown = np.frombuffer(b''.join(shown), dtype=np.bool_).reshape(choices.shape)
+        new_scores = percent_scores(choices, answer_key.correct, shown)
+        changed = ~np.isclose(new_scores, np.asarray(old_scores, dtype=np.float64))
+        report.changed = int(changed.sum())
+        if dry_run:
+            return report
+
+        ids = np.asarray(ids, dtype=np.int64)
+        # Result rows belong to the profile rather than the user
+        profile_ids = {}
+        for batch in chunks(np.asarray(students, dtype=np.int64)[changed], batch_size):
+            profile_ids.update(Profile.objects.filter(user_id__in=batch).values_list('user_id', 'id'))
+        profiles = np.array([profile_ids.get(user_id, 0) for user_id in students], dtype=np.int64)
+        # A score is a whole number of questions, so there are at most
+        # len(answer_key) + 1 distinct ones: one UPDATE per score and batch
+        # instead of one CASE branch per row
+        for score in np.unique(new_scores[changed]):
+            group = changed & (new_scores == score)
+            for batch in chunks(ids[group], batch_size):
+                StudentExam.objects.filter(id__in=batch).update(score=float(score))
+            for batch in chunks(profiles[group], batch_size):
+                report.results_updated += Result.objects.filter(
+                    exam_id=exam_id, student_id__in=batch
+                ).update(score=float(score))
+
+        # Store the responses in the current layout too, so later reports
+        # read them as they are
+        for batch in chunks(ids[np.asarray(stale, dtype=bool)], batch_size):
+            StudentExam.objects.filter(id__in=batch).update(key_version=answer_key.layout)
+        StudentExam.objects.bulk_update(
+            [StudentExam(id=int(ids[i]), responses=rows[i]) for i in np.flatnonzero(moved)],
+            ['responses'],
+            batch_size=batch_size,
+        )
+
+        ExamStatistics.rebuild(exam_id)
+    return report
@@ -0,0 +1,133 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.urls import reverse
+
+from .grading import OPTION_VALUES, get_answer_key
+from .models import Profile, Course, Subject, Exam, Question, StudentExam, Result, ExamStatistics
+
+
+class Cohort:
+    """
+    A synthetic course with one teacher, one exam and its students, all
+    named with a common prefix so the whole set can be removed again
+    """
+    def __init__(self, prefix, course, exam, teacher, usernames, password):
+        self.prefix = prefix
+        self.course = course
+        self.exam = exam
+        self.teacher = teacher
+        self.usernames = usernames
+        self.password = password
+
+    def delete(self):
+        # Deleting the course cascades to its subject, exam, questions and attempts
+        User.objects.filter(username__startswith=f'{self.prefix}-').delete()
+        self.course.delete()
+
+
+def simulated_responses(answer_key):
+    """
+    Packed answers of a simulated student, whose ability sets how likely
+    they are to pick the correct option; a few questions are left blank
+    """
+    ability = random.uniform(0.2, 0.95)
+    packed = bytearray()
+    for correct in answer_key.correct:
+        roll = random.random()
+        if roll < 0.03:
+            packed.append(0)
+        elif roll < ability and correct >= 0:
+            packed.append(correct + 1)
+        else:
+            packed.append(random.randint(1, len(OPTION_VALUES)))
+    return bytes(packed)
+
+
+def seed_cohort(prefix, students, questions=20, submitted=0, password='loadtest-password'):
+    """
+    Create a course, a teacher with an exam of ``questions`` questions and
+    ``students`` approved students enrolled in the course, the first
+    ``submitted`` of whom have already taken the exam
+    """
+    # Every student shares one password, so it is hashed only once
+    hashed = make_password(password)
+    usernames = [f'{prefix}-student-{i}' for i in range(students)]
+
+    with transaction.atomic():
+        course = Course.objects.create(name=f'{prefix} course')
+        subject = Subject.objects.create(name=f'{prefix} subject', course=course)
+        teacher = User.objects.create(username=f'{prefix}-teacher', password=hashed)
+        Profile.objects.create(user=teacher, role='teacher', is_teacher=True)
+
+        exam = Exam.objects.create(
+            name=f'{prefix} exam', subject=subject, course=course, created_by=teacher
+        )
+        Question.objects.bulk_create([
+            Question(
+                exam=exam,
+                question_text=f'Question {i + 1}',
+                option1='Option A',
+                option2='Option B',
+                option3='Option C',
+                option4='Option D',
+                correct_option=random.choice(OPTION_VALUES),
+            )
+            for i in range(questions)
+        ])
+
+        users = User.objects.bulk_create([
+            User(username=username, password=hashed) for username in usernames
+        ])
+        if any(user.pk is None for user in users):
+            users = User.objects.filter(username__in=usernames)
+        profiles = Profile.objects.bulk_create([
+            Profile(user=user, role='student', approved=True, course=course, roll_number=str(i))
+            for i, user in enumerate(users)
+        ])
+        if any(profile.pk is None for profile in profiles):
+            profiles = Profile.objects.filter(user__in=users).order_by('user_id')
+
+        if submitted:
+            answer_key = get_answer_key(exam.id)
+            responses = [simulated_responses(answer_key) for _ in range(submitted)]
+            scores = [answer_key.grade(answer_key.unpack(packed)) / questions * 100 for packed in responses]
+            StudentExam.objects.bulk_create([
+                StudentExam(
+                    student_id=profile.user_id, exam=exam, score=score, is_submitted=True,
+                    responses=packed, key_version=answer_key.layout,
+                )
+                for profile, score, packed in zip(profiles, scores, responses)
+            ])
+            Result.objects.bulk_create([
+                Result(student=profile, exam=exam, score=score)
+                for profile, score in zip(profiles, scores)
+            ])
+            ExamStatistics.rebuild(exam.id)
+
+    return Cohort(prefix, course, exam, teacher, usernames, password)
+
+
+def sample_pages(cohort):
+    """
+    (name, user, url) for every HTML page, as a teacher, a student who
+    took the exam and one who has not (so the exam page renders). The
+    cohort needs at least one submitted and one pending student.
+    """
+    teacher = cohort.teacher
+    student = User.objects.get(username=cohort.usernames[0])
+    newcomer = User.objects.get(username=cohort.usernames[-1])
+    exam_id = cohort.exam.id
+    return [
+        ('login', None, reverse('login')),
+        ('teacher_dashboard', teacher, reverse('teacher_dashboard')),
+        ('teacher_create_exam', teacher, reverse('teacher_create_exam')),
+        ('teacher_exam_detail', teacher, reverse('teacher_exam_detail', args=[exam_id])),
+        ('teacher_exam_results', teacher, reverse('teacher_exam_results', args=[exam_id])),
+        ('teacher_student', teacher, reverse('teacher_student')),
+        ('student_dashboard', student, reverse('student_dashboard')),
+        ('student_history', student, reverse('student_history')),
+        ('student_take_exam', newcomer, reverse('student_take_exam', args=[exam_id])),
+    ]
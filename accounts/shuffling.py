@@ -0,0 +1,31 @@
+"""
+Per-attempt shuffling of the question paper. Every StudentExam has a
+random ``paper_seed``, and the order of its questions and of each
+question's options is derived from that seed whenever the paper is
+shown, so nothing is stored per student beyond the seed.
+
+The shuffled inputs keep their real names and option values, so the
+posted answers, drafts and grading never see the shuffled order.
+"""
+import random
+
+
+def paper_order(seed, option_counts):
+    """
+    Display order of a paper whose questions, in answer key order, have
+    ``option_counts`` options each: a list of (question position, option
+    positions). The same seed always gives the same order; no seed gives
+    the plain one.
+    """
+    if seed is None:
+        return [(position, range(count)) for position, count in enumerate(option_counts)]
+
+    rng = random.Random(seed)
+    questions = list(range(len(option_counts)))
+    rng.shuffle(questions)
+    order = []
+    for position in questions:
+        options = list(range(option_counts[position]))
+        rng.shuffle(options)
+        order.append((position, options))
+    return order
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .grading import invalidate_answer_key
+from .models import Exam, ExamStatistics, Question, StudentExam
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    # In the same transaction, so other processes see the new version
+    # together with the changed rows
+    invalidate_answer_key(instance.exam_id)
+
+
+def rebuild_statistics(exam_id):
+    # The exam may have been deleted together with its attempts
+    if Exam.objects.filter(pk=exam_id).exists():
+        ExamStatistics.rebuild(exam_id)
+
+
+@receiver(post_delete, sender=StudentExam)
+def attempt_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Statistics are only added to on submission, so a deleted submission
+    (admin, cascade or queryset.delete()) rebuilds them once it commits
+    """
+    if not instance.is_submitted:
+        return
+    # One rebuild per exam, however many of its attempts one delete removes
+    scheduled = origin.__dict__.setdefault('_statistics_rebuilds', set()) if origin is not None else set()
+    if instance.exam_id in scheduled:
+        return
+    scheduled.add(instance.exam_id)
+    exam_id = instance.exam_id
+    transaction.on_commit(lambda: rebuild_statistics(exam_id))
@@ -0,0 +1,16 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class CollectedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Whitenoise's hashed, compressed static files, using the plain name of
+    any file collectstatic has not processed yet (a fresh checkout, or a
+    file added since) instead of failing every page that links to it
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
@@ -1,3 +1,1252 @@
-from django.test import TestCase
+import importlib.util
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from io import StringIO
+from urllib.parse import urlsplit
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.db.models import Q
+import unittest
+from unittest import skipUnless
+
+from django.test import LiveServerTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .analysis import item_analysis
+from .caching import get_exam_paper
+from .drafts import draft_answers
+from .grading import _local_keys, get_answer_key
+from .loadtest import AsyncLoadTest, HTTPLoadTest, LoadTest, is_lock_error
+from .management.commands.page_weight import PLAIN_STORAGES
+from .models import Profile, Course, Subject, Exam, Question, StudentExam, AnswerDraft, Result, ExamStatistics
+from .pagination import encode_cursor, keyset_paginate, keyset_paginate_any
+from .ranking import ScoreIndex, score_step
+from .regrading import regrade_exam
+from .seeding import seed_cohort
+from .views import ROSTER_ORDERING, submit_answers
+from . import writebehind
+
+
+# Wall-clock ceilings, generous so a slow or busy machine does not fail
+# them; the query counts are what pin the views down
+VIEW_TIME_BUDGET = float(os.environ.get('VIEW_TIME_BUDGET', '2.0'))
+ANALYSIS_TIME_BUDGET = float(os.environ.get('ANALYSIS_TIME_BUDGET', '10.0'))
+
+
+def setUpModule():
+    # Pages link unhashed static files, whether or not collectstatic has run
+    storages = override_settings(STORAGES=PLAIN_STORAGES)
+    storages.enable()
+    unittest.addModuleCleanup(storages.disable)
+
+
+def clear_caches():
+    # Each test's exams are rolled back, so later tests reuse their ids
+    # and question versions
+    cache.clear()
+    _local_keys.clear()
+
+
+class TeacherDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name='BSc')
+        cls.subject = Subject.objects.create(name='Maths', course=cls.course)
+        cls.teacher = User.objects.create_user('teacher', password='pass')
+        Profile.objects.create(user=cls.teacher, role='teacher')
+
+    def setUp(self):
+        self.client.force_login(self.teacher)
+
+    def add_exam(self, scores):
+        exam = Exam.objects.create(
+            name='Exam', subject=self.subject, course=self.course, created_by=self.teacher
+        )
+        for score in scores:
+            student = User.objects.create_user(f'student{User.objects.count()}')
+            StudentExam.objects.create(student=student, exam=exam).submit_exam(score)
+        return exam
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('teacher_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx)
+
+    def test_navigation_is_cached_per_role(self):
+        cache.clear()
+        self.client.get(reverse('teacher_dashboard'))
+        self.assertIsNotNone(cache.get(make_template_fragment_key('teacher_sidebar', ['dashboard'])))
+        # Per-user fragments are not cached, so they cannot crowd out answer keys
+        self.assertIsNone(cache.get(make_template_fragment_key('teacher_header', ['teacher'])))
+
+        # Every teacher shares the sidebar; only the header names the user
+        other = User.objects.create_user('other')
+        Profile.objects.create(user=other, role='teacher')
+        self.client.force_login(other)
+        response = self.client.get(reverse('teacher_dashboard'))
+        self.assertContains(response, '<h3>other</h3>', html=True)
+        self.assertContains(response, 'class="active"', count=1)
+
+    def test_exam_statistics(self):
+        exam = self.add_exam([40, 80, 90])
+        self.add_exam([])
+        response, _ = self.count_queries()
+
+        stats = {row['exam'].id: row for row in response.context['exam_stats']}
+        self.assertEqual(stats[exam.id]['submissions'], 3)
+        self.assertEqual(stats[exam.id]['average'], 70)
+        self.assertEqual(stats[exam.id]['highest'], 90)
+        self.assertEqual(stats[exam.id]['lowest'], 40)
+        self.assertEqual(stats[exam.id]['pass_rate'], 66.7)
+        self.assertEqual(response.context['completed_exams'], 3)
+        self.assertEqual(response.context['average_score'], 70)
+
+    def test_query_count_does_not_grow_with_exams(self):
+        self.add_exam([50, 75])
+        _, baseline = self.count_queries()
+
+        for _ in range(10):
+            self.add_exam([20, 60, 100])
+        _, queries = self.count_queries()
+        self.assertEqual(queries, baseline)
+
+    def test_recent_submissions_feed_is_keyset_paginated(self):
+        self.add_exam(range(25))
+        response, _ = self.count_queries()
+        first_page = response.context['recent_submissions']
+        self.assertEqual(len(first_page), 20)
+
+        feed = self.client.get(reverse('teacher_submissions_feed'), {'cursor': response.context['next_cursor']}).json()
+        self.assertEqual(len(feed['results']), 5)
+        self.assertIsNone(feed['next'])
+        ids = [s.id for s in first_page] + [row['id'] for row in feed['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+        self.assertEqual(len(set(ids)), 25)
+
+    def test_tampered_feed_cursor_starts_over(self):
+        self.add_exam(range(25))
+        first_page = self.client.get(reverse('teacher_submissions_feed')).json()
+        for values in (['x', 'y', 'z'], [{'a': 1}, None, 1], ['x'], [None], [[1]], {'id': 1}):
+            response = self.client.get(reverse('teacher_submissions_feed'), {'cursor': encode_cursor(values)})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), first_page)
+        self.assertEqual(self.client.get(reverse('teacher_submissions_feed'), {'cursor': '%%%'}).json(), first_page)
+
+
+class ExamStatisticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(name='BSc')
+        subject = Subject.objects.create(name='Maths', course=course)
+        cls.teacher = User.objects.create_user('teacher')
+        cls.exam = Exam.objects.create(name='Exam', subject=subject, course=course, created_by=cls.teacher)
+
+    def submit(self, username, score):
+        student = User.objects.create_user(username)
+        StudentExam.objects.create(student=student, exam=self.exam).submit_exam(score)
+
+    def test_submission_updates_statistics(self):
+        self.submit('a', 40)
+        self.submit('b', 100)
+        stats = ExamStatistics.objects.get(exam=self.exam)
+        self.assertEqual(stats.count, 2)
+        self.assertEqual(stats.mean, 70)
+        self.assertEqual(stats.stddev, 30)
+        self.assertEqual((stats.min_score, stats.max_score), (40, 100))
+        self.assertEqual((stats.pass_count, stats.fail_count), (1, 1))
+        self.assertEqual(stats.histogram[4], 1)
+        self.assertEqual(stats.histogram[9], 1)
+
+    def test_rebuild_matches_incremental(self):
+        for i, score in enumerate([10, 55, 60, 95]):
+            self.submit(f's{i}', score)
+        incremental = ExamStatistics.objects.get(exam=self.exam).as_dict()
+        ExamStatistics.objects.all().delete()
+        call_command('rebuild_exam_statistics', stdout=StringIO())
+        self.assertEqual(ExamStatistics.objects.get(exam=self.exam).as_dict(), incremental)
+
+    def test_deleted_submissions_rebuild_statistics(self):
+        for i, score in enumerate([10, 55, 60, 95]):
+            self.submit(f's{i}', score)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            StudentExam.objects.filter(score__lt=50).delete()
+            StudentExam.objects.get(score=95).delete()
+        self.assertEqual(len(callbacks), 2)
+        stats = ExamStatistics.objects.get(exam=self.exam)
+        self.assertEqual((stats.count, stats.min_score, stats.max_score), (2, 55, 60))
+        self.assertEqual(stats.standing(60)['rank'], 1)
+
+        # Deleting the exam takes its statistics along
+        with self.captureOnCommitCallbacks(execute=True):
+            Exam.objects.filter(pk=self.exam.pk).delete()
+        self.assertFalse(ExamStatistics.objects.exists())
+
+    def test_admin_edits_rebuild_and_statistics_are_read_only(self):
+        self.submit('a', 40)
+        attempt = StudentExam.objects.get()
+        admin_user = User.objects.create_superuser('admin', password='pass')
+        self.client.force_login(admin_user)
+        change_url = reverse('admin:accounts_studentexam_change', args=[attempt.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(change_url, {
+                'student': attempt.student_id, 'exam': self.exam.pk, 'score': '90', 'is_submitted': 'on',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ExamStatistics.objects.get(exam=self.exam).max_score, 90)
+
+        stats = ExamStatistics.objects.get(exam=self.exam)
+        self.assertEqual(self.client.get(reverse('admin:accounts_examstatistics_add')).status_code, 403)
+        response = self.client.get(reverse('admin:accounts_examstatistics_change', args=[stats.pk]))
+        self.assertNotContains(response, 'name="count"')
+
+        ExamStatistics.objects.filter(pk=stats.pk).update(count=0)
+        self.client.post(reverse('admin:accounts_examstatistics_changelist'), {
+            'action': 'rebuild_statistics', '_selected_action': [stats.pk],
+        })
+        self.assertEqual(ExamStatistics.objects.get(pk=stats.pk).count, 1)
+
+
+class StudentTakeExamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name='BSc')
+        subject = Subject.objects.create(name='Maths', course=cls.course)
+        teacher = User.objects.create_user('teacher')
+        cls.exam = Exam.objects.create(name='Exam', subject=subject, course=cls.course, created_by=teacher)
+        cls.questions = [
+            Question.objects.create(
+                exam=cls.exam, question_text=f'Q{i}', option1='a', option2='b', correct_option=correct
+            )
+            for i, correct in enumerate(['option1', 'option2', 'option1', 'option2'])
+        ]
+        cls.student = User.objects.create_user('student')
+        Profile.objects.create(user=cls.student, role='student', course=cls.course)
+
+    def setUp(self):
+        clear_caches()
+        self.client.force_login(self.student)
+        self.url = reverse('student_take_exam', args=[self.exam.id])
+
+    def test_exam_page_queries(self):
+        # Warm the session, the attempt and the cached key and paper
+        self.client.get(self.url)
+        # Session, user, exam with its subject, attempt, draft: the course
+        # check compares ids without loading either course
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['question_count'], 4)
+
+    def test_submission_is_graded(self):
+        answers = {str(q.id): 'option1' for q in self.questions}
+        response = self.client.post(self.url, answers)
+        self.assertRedirects(response, reverse('student_history'), fetch_redirect_response=False)
+
+        attempt = StudentExam.objects.get(student=self.student, exam=self.exam)
+        self.assertTrue(attempt.is_submitted)
+        self.assertEqual(attempt.score, 50)
+        self.assertEqual(Result.objects.get(exam=self.exam).score, 50)
+        # One byte per question: option1 everywhere
+        self.assertEqual(bytes(attempt.responses), b'\x01\x01\x01\x01')
+        self.assertEqual(attempt.key_version, get_answer_key(self.exam.id).layout)
+
+    async def test_async_submission_is_graded(self):
+        await self.async_client.aforce_login(self.student)
+        url = reverse('student_submit_exam', args=[self.exam.id])
+        answers = {str(q.id): 'option2' for q in self.questions}
+        response = await self.async_client.post(url, answers)
+        self.assertRedirects(response, reverse('student_history'), fetch_redirect_response=False)
+
+        attempt = await StudentExam.objects.aget(student=self.student, exam=self.exam)
+        self.assertTrue(attempt.is_submitted)
+        self.assertEqual(attempt.score, 50)
+        self.assertEqual(await Result.objects.filter(exam=self.exam).acount(), 1)
+
+        response = await self.async_client.post(url, answers)
+        self.assertEqual(response.context['error'], 'You have already completed this exam.')
+        self.assertEqual(await Result.objects.filter(exam=self.exam).acount(), 1)
+
+    def test_stale_double_submission_is_rejected(self):
+        attempt = StudentExam.objects.create(student=self.student, exam=self.exam)
+        # Loaded before the first submission commits, as a concurrent request would
+        stale = StudentExam.objects.get(pk=attempt.pk)
+        answer_key = get_answer_key(self.exam.id)
+        profile = self.student.profile
+
+        self.assertTrue(submit_answers(attempt, profile, answer_key, {str(self.questions[0].id): 'option1'}))
+        self.assertFalse(submit_answers(stale, profile, answer_key, {}))
+
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 25)
+        self.assertEqual(Result.objects.filter(exam=self.exam).count(), 1)
+        self.assertEqual(ExamStatistics.objects.get(exam=self.exam).count, 1)
+
+    def test_autosaved_draft_is_restored_and_graded(self):
+        self.client.get(self.url)
+        autosave_url = reverse('student_autosave_exam', args=[self.exam.id])
+        first, second, third = (str(q.id) for q in self.questions[:3])
+
+        response = self.client.post(autosave_url, {first: 'option1', second: 'option1'})
+        self.assertEqual(response.json(), {'answered': 2})
+        response = self.client.post(autosave_url, {second: 'option2', third: 'option2'})
+        self.assertEqual(response.json(), {'answered': 3})
+
+        draft = AnswerDraft.objects.get(student_exam__student=self.student)
+        # One byte per question, in answer key order
+        self.assertEqual(bytes(draft.answers), bytes([1, 2, 2, 0]))
+        self.assertEqual(self.client.get(self.url).context['saved_answers'],
+                         {first: 'option1', second: 'option2', third: 'option2'})
+
+        # The final request carries only the answer changed since the last autosave
+        self.client.post(self.url, {third: 'option1'})
+        self.assertEqual(StudentExam.objects.get(student=self.student).score, 75)
+        self.assertFalse(AnswerDraft.objects.exists())
+        self.assertEqual(self.client.post(autosave_url, {first: 'option2'}).status_code, 409)
+
+    def test_draft_is_graded_without_the_cache(self):
+        self.client.get(self.url)
+        autosave_url = reverse('student_autosave_exam', args=[self.exam.id])
+        correct = {str(q.id): q.correct_option for q in self.questions}
+        first, second, third, fourth = correct
+        self.client.post(autosave_url, {first: correct[first], second: correct[second], third: correct[third]})
+
+        # Another worker, or a restarted one, with nothing cached
+        clear_caches()
+        self.client.post(self.url, {fourth: correct[fourth]})
+        self.assertEqual(StudentExam.objects.get(student=self.student).score, 100)
+
+    def test_draft_survives_question_changes(self):
+        self.client.get(self.url)
+        autosave_url = reverse('student_autosave_exam', args=[self.exam.id])
+        self.client.post(autosave_url, {str(self.questions[3].id): 'option2'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.questions[0].delete()
+        # The draft's layout is read from the database, not the cache
+        clear_caches()
+        answer_key = get_answer_key(self.exam.id)
+        attempt = StudentExam.objects.get(student=self.student)
+        self.assertEqual(draft_answers(attempt, answer_key), {str(self.questions[3].id): 'option2'})
+
+    def test_submission_runs_no_question_queries(self):
+        get_answer_key(self.exam.id)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, {})
+        self.assertFalse([q for q in ctx.captured_queries if 'accounts_question' in q['sql']])
+
+    def test_exam_paper_is_cached(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Q3')
+        self.assertEqual(response.context['question_count'], 4)
+        self.assertFalse([q for q in ctx.captured_queries if 'accounts_question' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(
+                exam=self.exam, question_text='Q4', option1='a', option2='b', correct_option='option1'
+            )
+        self.assertContains(self.client.get(self.url), 'Q4')
+
+    def test_paper_follows_question_edits_in_other_workers(self):
+        version = Exam.objects.get(pk=self.exam.pk).questions_version
+        self.assertContains(self.client.get(self.url), 'Q0')
+        question = self.questions[0]
+        question.question_text = 'Edited'
+        question.save()
+
+        # The pieces of the old version stay cached, as they would in every
+        # worker that did not handle the edit, but are no longer used
+        self.assertIsNotNone(cache.get(f'exam:{self.exam.id}:paper_pieces:{version}'))
+        self.assertContains(self.client.get(self.url), 'Edited')
+        self.assertNotIn('Q0', get_exam_paper(self.exam.id))
+
+    def test_paper_is_shuffled_per_attempt(self):
+        def inputs(paper):
+            return re.findall(r'name="(\d+)" value="(option\d)"', paper)
+
+        plain = inputs(get_exam_paper(self.exam.id))
+        papers = [inputs(get_exam_paper(self.exam.id, seed)) for seed in range(20)]
+        # Every paper has the same inputs, with their real option values
+        for paper in papers:
+            self.assertEqual(sorted(paper), sorted(plain))
+        self.assertGreater(len({tuple(paper) for paper in papers}), 1)
+        self.assertEqual(inputs(get_exam_paper(self.exam.id, 7)), papers[7])
+
+        response = self.client.get(self.url)
+        attempt = StudentExam.objects.get(student=self.student)
+        self.assertIsNotNone(attempt.paper_seed)
+        self.assertEqual(inputs(str(response.context['paper'])), inputs(get_exam_paper(self.exam.id, attempt.paper_seed)))
+
+    def test_answer_key_invalidated_when_question_changes(self):
+        self.assertEqual(len(get_answer_key(self.exam.id)), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            question = self.questions[0]
+            question.correct_option = 'option2'
+            question.save()
+        self.assertEqual(get_answer_key(self.exam.id).correct[0], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.create(
+                exam=self.exam, question_text='Q4', option1='a', option2='b', correct_option='option1'
+            )
+        self.assertEqual(len(get_answer_key(self.exam.id)), 5)
+
+    def test_stale_exam_save_keeps_the_question_version(self):
+        stale = Exam.objects.get(pk=self.exam.pk)
+        self.assertEqual(len(get_answer_key(self.exam.id)), 4)
+        Question.objects.create(exam=self.exam, question_text='Q4', option1='a', option2='b', correct_option='option1')
+        version = Exam.objects.get(pk=self.exam.pk).questions_version
+        self.assertEqual(version, stale.questions_version + 1)
+
+        stale.name = 'Renamed'
+        stale.save()
+        exam = Exam.objects.get(pk=self.exam.pk)
+        self.assertEqual((exam.name, exam.questions_version), ('Renamed', version))
+        self.assertEqual(len(get_answer_key(self.exam.id)), 5)
+
+        stale.save(update_fields=['name', 'questions_version'])
+        self.assertEqual(Exam.objects.get(pk=self.exam.pk).questions_version, version)
+
+    def test_other_workers_see_question_changes(self):
+        answer_key = get_answer_key(self.exam.id)
+        question = self.questions[0]
+        question.correct_option = 'option2'
+        question.save()
+        self.assertEqual(Exam.objects.get(pk=self.exam.pk).questions_version, answer_key.version + 1)
+
+        # A worker still holding the old key in its own memory and cache
+        _local_keys[self.exam.id] = answer_key
+        self.assertEqual(get_answer_key(self.exam.id).correct[0], 1)
+
+
+@override_settings(PASSWORD_HASHERS=['accounts.hashers.TunablePBKDF2PasswordHasher'], PASSWORD_HASH_ITERATIONS=1000)
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('student', password='secret')
+        Profile.objects.create(user=cls.student, role='student')
+
+    def login(self, username, password):
+        return self.client.post(reverse('login'), {'username': username, 'password': password})
+
+    def test_login_page_renders_before_collectstatic(self):
+        storages = dict(PLAIN_STORAGES, staticfiles={'BACKEND': 'accounts.storage.CollectedStaticFilesStorage'})
+        with tempfile.TemporaryDirectory() as static_root, self.settings(STATIC_ROOT=static_root, STORAGES=storages):
+            response = self.client.get(reverse('login'))
+        self.assertContains(response, '/static/accounts/css/base.css')
+
+    def test_login_is_one_user_lookup(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.login('student', 'secret')
+        self.assertRedirects(response, reverse('student_dashboard'), fetch_redirect_response=False)
+        user_queries = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT') and '"auth_user"' in q['sql']]
+        self.assertEqual(len(user_queries), 1)
+        self.assertEqual(self.login('student', 'wrong').context['error'], 'Invalid password')
+        self.assertEqual(self.login('nobody', 'secret').context['error'], 'Invalid username')
+
+    def test_hash_follows_configured_iterations(self):
+        self.assertTrue(User.objects.get(pk=self.student.pk).password.startswith('pbkdf2_sha256$1000$'))
+        with self.settings(PASSWORD_HASH_ITERATIONS=1500):
+            self.login('student', 'secret')
+        self.assertTrue(User.objects.get(pk=self.student.pk).password.startswith('pbkdf2_sha256$1500$'))
+
+
+class RosterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher')
+        Profile.objects.create(user=cls.teacher, role='teacher', is_teacher=True)
+        cls.courses = [Course.objects.create(name=name) for name in ('BSc', 'MSc', 'PhD')]
+        for course in cls.courses[:2]:
+            subject = Subject.objects.create(name='Maths', course=course)
+            Exam.objects.create(name='Exam', subject=subject, course=course, created_by=cls.teacher)
+        # Students of the third course are not the teacher's
+        for course in cls.courses:
+            for i, roll_number in enumerate([None, 'A10', 'A2', None, 'B1']):
+                user = User.objects.create_user(f'{course.name.lower()}-{i}')
+                Profile.objects.create(user=user, role='student', course=course, roll_number=roll_number)
+
+    def test_pages_cover_every_row_once_with_null_roll_numbers(self):
+        queryset = Profile.objects.filter(role='student')
+        expected = list(queryset.order_by(*ROSTER_ORDERING))
+        rows, cursor = [], None
+        while True:
+            page, cursor = keyset_paginate(queryset, ROSTER_ORDERING, cursor=cursor, size=2)
+            rows += page
+            if cursor is None:
+                break
+        self.assertEqual(rows, expected)
+
+        descending = ['-course_id', '-roll_number', '-id']
+        rows, cursor = [], None
+        while True:
+            page, cursor = keyset_paginate(queryset, descending, cursor=cursor, size=3)
+            rows += page
+            if cursor is None:
+                break
+        self.assertEqual(rows, list(queryset.order_by(*descending)))
+
+        # Rows matching both conditions come once, in order
+        conditions = [Q(roll_number__startswith='A'), Q(user__username__startswith='bsc')]
+        rows, cursor = [], None
+        while True:
+            page, cursor = keyset_paginate_any(queryset, conditions, ROSTER_ORDERING, cursor=cursor, size=2)
+            rows += page
+            if cursor is None:
+                break
+        self.assertEqual(rows, list(queryset.filter(conditions[0] | conditions[1]).order_by(*ROSTER_ORDERING)))
+
+    def test_roster_filters_and_feed(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('teacher_student'))
+        self.assertEqual(len(response.context['students']), 10)
+        self.assertEqual([course.name for course in response.context['courses']], ['BSc', 'MSc'])
+
+        response = self.client.get(reverse('teacher_student'), {'course': self.courses[1].id, 'q': 'A'})
+        self.assertEqual([s.roll_number for s in response.context['students']], ['A10', 'A2'])
+        response = self.client.get(reverse('teacher_student'), {'q': 'msc-4'})
+        self.assertEqual([s.user.username for s in response.context['students']], ['msc-4'])
+
+        feed = self.client.get(reverse('teacher_student_feed'), {'course': self.courses[0].id}).json()
+        self.assertEqual(len(feed['results']), 5)
+        self.assertIsNone(feed['next'])
+        self.assertEqual(feed['results'][-1]['roll_number'], 'B1')
+
+    def test_malformed_roster_cursor_starts_over(self):
+        self.client.force_login(self.teacher)
+        url = reverse('teacher_student_feed')
+        for params in ({}, {'q': 'A'}):
+            first_page = self.client.get(url, params).json()
+            for values in (['x', 'y', 'z'], [{'a': 1}, None, 1], [1, 'A1', None], [None, None, 'id'], [1, 2]):
+                with self.subTest(params=params, values=values):
+                    response = self.client.get(url, dict(params, cursor=encode_cursor(values)))
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.json(), first_page)
+
+
+class UserContextTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name='BSc')
+        cls.teacher = User.objects.create_user('teacher')
+        Profile.objects.create(user=cls.teacher, role='teacher', is_teacher=True)
+        cls.student = User.objects.create_user('student')
+        Profile.objects.create(user=cls.student, role='student', course=cls.course)
+
+    def profile_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        user_queries = [q['sql'] for q in ctx.captured_queries if 'FROM "auth_user"' in q['sql']]
+        # What user.profile costs without the join
+        profile_queries = [
+            q['sql'] for q in ctx.captured_queries if 'WHERE "accounts_profile"."user_id" =' in q['sql']
+        ]
+        return response, user_queries, profile_queries
+
+    def test_profile_and_course_load_with_the_user(self):
+        self.client.force_login(self.student)
+        response, user_queries, profile_queries = self.profile_queries(reverse('student_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(user_queries), 1)
+        self.assertIn('"accounts_course"', user_queries[0])
+        self.assertEqual(profile_queries, [])
+
+        # The role check for teachers is answered from the same row
+        self.client.force_login(self.teacher)
+        response, user_queries, profile_queries = self.profile_queries(reverse('teacher_student'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(profile_queries, [])
+
+    def test_roles_and_missing_profiles(self):
+        self.client.force_login(self.student)
+        self.assertRedirects(self.client.get(reverse('teacher_student')), reverse('login'),
+                             fetch_redirect_response=False)
+
+        newcomer = User.objects.create_user('newcomer')
+        self.client.force_login(newcomer)
+        self.assertEqual(self.client.get(reverse('student_dashboard')).status_code, 200)
+        self.assertEqual(Profile.objects.get(user=newcomer).role, 'student')
+
+
+class ItemAnalysisTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_statistics_match_their_definitions(self):
+        # Four students, three questions keyed A, B and (none)
+        choices = np.array([[1, 2, 1], [1, 3, 2], [2, 2, 0], [3, 0, 4]], dtype=np.uint8)
+        analysis = item_analysis(choices, [0, 1, -1])
+
+        right = np.array([[1, 1], [1, 0], [0, 1], [0, 0]])
+        totals = right.sum(axis=1)
+        np.testing.assert_allclose(analysis['difficulty'][:2], [0.5, 0.5])
+        self.assertTrue(np.isnan(analysis['difficulty'][2]))
+        for item in range(2):
+            rest = totals - right[:, item]
+            self.assertAlmostEqual(analysis['discrimination'][item], np.corrcoef(right[:, item], rest)[0, 1])
+        p = right.mean(axis=0)
+        self.assertAlmostEqual(analysis['kr20'], 2 * (1 - (p * (1 - p)).sum() / totals.var()))
+        # Blank, A, B, C, D
+        self.assertEqual(analysis['options'][1].tolist(), [1, 0, 2, 1, 0])
+
+    def test_large_exam_is_analysed_quickly(self):
+        rng = np.random.default_rng(0)
+        choices = rng.integers(0, 5, size=(50_000, 200), dtype=np.uint8)
+        started = time.perf_counter()
+        analysis = item_analysis(choices, rng.integers(0, 4, size=200))
+        self.assertLess(time.perf_counter() - started, ANALYSIS_TIME_BUDGET)
+        self.assertEqual(analysis['students'], 50_000)
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_report_lists_every_question(self):
+        cohort = seed_cohort('items', students=30, questions=5, submitted=30)
+        self.client.force_login(cohort.teacher)
+        response = self.client.get(reverse('teacher_item_analysis', args=[cohort.exam.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['students'], 30)
+        self.assertEqual(len(response.context['items']), 5)
+        for item in response.context['items']:
+            self.assertEqual(sum(option['count'] for option in item['options']) + item['blank'], 30)
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_attempts_on_an_earlier_layout_are_kept_without_the_cache(self):
+        cohort = seed_cohort('items', students=10, questions=4, submitted=10)
+        first = Question.objects.filter(exam=cohort.exam).order_by('id').first()
+        before = list(StudentExam.objects.filter(exam=cohort.exam).values_list('responses', flat=True))
+        Question.objects.create(exam=cohort.exam, question_text='New', option1='a', option2='b', correct_option='option1')
+
+        # A fresh worker: neither the old nor the new key is cached
+        clear_caches()
+        self.client.force_login(cohort.teacher)
+        response = self.client.get(reverse('teacher_item_analysis', args=[cohort.exam.id]))
+        self.assertEqual((response.context['students'], response.context['skipped']), (10, 0))
+        items = response.context['items']
+        self.assertEqual(len(items), 5)
+        # The first question's answers kept their place; nobody answered the new one
+        chosen = [responses[0] for responses in before]
+        self.assertEqual([option['count'] for option in items[0]['options']], [chosen.count(value) for value in range(1, 5)])
+        self.assertEqual(items[4]['blank'], 10)
+        self.assertEqual(items[0]['text'], first.question_text)
+
+
+class RankingTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def test_index_counts_match_a_scan(self):
+        rng = np.random.default_rng(0)
+        scores = np.round(rng.uniform(0, 100, 500), 1).tolist() + [0, 100, 100]
+        incremental = ScoreIndex()
+        for score in scores:
+            incremental.add(score)
+        built = ScoreIndex.from_scores(scores)
+        self.assertEqual(incremental.pack(), built.pack())
+        for step in (0, 1, 250, 999, 1000):
+            self.assertEqual(built.at_most(step), sum(score_step(score) <= step for score in scores))
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_history_shows_rank_in_one_query(self):
+        cohort = seed_cohort('rank', students=40, questions=5, submitted=40)
+        attempts = StudentExam.objects.filter(exam=cohort.exam)
+        student = User.objects.get(username='rank-student-0')
+        score = attempts.get(student=student).score
+        scores = list(attempts.values_list('score', flat=True))
+
+        self.client.force_login(student)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('student_history'))
+        self.assertEqual(
+            len([q for q in ctx.captured_queries if 'accounts_studentexam' in q['sql']]), 1
+        )
+        standing = response.context['records'][0].standing
+        self.assertEqual(standing['rank'], 1 + sum(other > score for other in scores))
+        self.assertEqual(standing['out_of'], 40)
+        below = sum(other < score for other in scores)
+        ties = sum(other == score for other in scores)
+        self.assertAlmostEqual(standing['percentile'], (below + ties / 2) / 40 * 100)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RegradeTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.cohort = seed_cohort('regrade', students=20, questions=4, submitted=20)
+        self.exam = self.cohort.exam
+        # Fix the key of the first question: option1 becomes option2
+        self.question = Question.objects.filter(exam=self.exam).order_by('id').first()
+        self.before = get_answer_key(self.exam.id)
+
+    def change_key(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.correct_option = 'option2' if self.question.correct_option != 'option2' else 'option3'
+            self.question.save()
+
+    def expected_scores(self):
+        answer_key = get_answer_key(self.exam.id)
+        return {
+            attempt.student_id: answer_key.grade(self.before.unpack(bytes(attempt.responses))) / len(answer_key) * 100
+            for attempt in StudentExam.objects.filter(exam=self.exam)
+        }
+
+    def test_scores_follow_the_corrected_key(self):
+        self.change_key()
+        expected = self.expected_scores()
+        old = dict(StudentExam.objects.filter(exam=self.exam).values_list('student_id', 'score'))
+
+        report = regrade_exam(self.exam.id)
+
+        self.assertEqual(report.attempts, 20)
+        self.assertEqual(report.changed, sum(abs(expected[user] - old[user]) > 1e-9 for user in old))
+        self.assertGreater(report.changed, 0)
+        for attempt in StudentExam.objects.filter(exam=self.exam):
+            self.assertAlmostEqual(attempt.score, expected[attempt.student_id])
+            self.assertEqual(attempt.key_version, get_answer_key(self.exam.id).layout)
+        for result in Result.objects.filter(exam=self.exam).select_related('student'):
+            self.assertAlmostEqual(result.score, expected[result.student.user_id])
+        stats = ExamStatistics.objects.get(exam=self.exam)
+        self.assertAlmostEqual(stats.total / stats.count, sum(expected.values()) / 20)
+
+    def test_dry_run_writes_nothing(self):
+        self.change_key()
+        old = list(StudentExam.objects.filter(exam=self.exam).order_by('id').values_list('score', 'key_version'))
+        out = StringIO()
+        call_command('regrade_exam', self.exam.id, '--dry-run', stdout=out)
+        self.assertIn('scores would change', out.getvalue())
+        self.assertEqual(
+            list(StudentExam.objects.filter(exam=self.exam).order_by('id').values_list('score', 'key_version')), old
+        )
+
+    def test_teacher_regrades_from_results_page(self):
+        self.change_key()
+        self.client.force_login(self.cohort.teacher)
+        response = self.client.post(reverse('teacher_regrade_exam', args=[self.exam.id]))
+        self.assertEqual(response.status_code, 200)
+        report = response.context['regrade_report']
+        self.assertFalse(report.dry_run)
+        self.assertEqual(regrade_exam(self.exam.id, dry_run=True).changed, 0)
+
+    def test_regrade_in_a_fresh_process(self):
+        old_layout = self.before.layout
+        # Another question goes in first, so the attempts are on an earlier layout
+        Question.objects.create(exam=self.exam, question_text='New', option1='a', option2='b', correct_option='option1')
+        self.change_key()
+        # Attempts share a key version while the questions' order is the same
+        self.assertEqual(len(set(StudentExam.objects.filter(exam=self.exam).values_list('key_version', flat=True))), 1)
+
+        # Nothing cached: the command runs in a new process
+        clear_caches()
+        out, err = StringIO(), StringIO()
+        call_command('regrade_exam', self.exam.id, stdout=out, stderr=err)
+        self.assertIn('20 attempts predate questions added since', err.getvalue())
+
+        answer_key = get_answer_key(self.exam.id)
+        for attempt in StudentExam.objects.filter(exam=self.exam):
+            # Still on the layout they were shown, so the new question stays unseen
+            self.assertEqual(attempt.key_version, old_layout)
+            self.assertEqual(len(attempt.responses), 4)
+            # Graded on the four questions they saw; the new one does not count
+            self.assertAlmostEqual(
+                attempt.score, answer_key.grade(self.before.unpack(bytes(attempt.responses))) / 4 * 100
+            )
+        self.assertEqual(regrade_exam(self.exam.id, dry_run=True).changed, 0)
+
+    def test_removed_questions_leave_the_score(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.question.delete()
+        report = regrade_exam(self.exam.id)
+
+        answer_key = get_answer_key(self.exam.id)
+        self.assertEqual((report.partial, report.skipped), (0, 0))
+        for attempt in StudentExam.objects.filter(exam=self.exam):
+            # Nothing is lost by storing them in the current layout
+            self.assertEqual(attempt.key_version, answer_key.layout)
+            self.assertAlmostEqual(attempt.score, answer_key.grade(answer_key.unpack(bytes(attempt.responses))) / 3 * 100)
+
+    def test_empty_key_is_refused(self):
+        old = list(StudentExam.objects.filter(exam=self.exam).order_by('id').values_list('score', flat=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            Question.objects.filter(exam=self.exam).delete()
+
+        with self.assertRaisesMessage(CommandError, 'no questions'):
+            call_command('regrade_exam', self.exam.id, stdout=StringIO())
+        self.client.force_login(self.cohort.teacher)
+        response = self.client.post(reverse('teacher_regrade_exam', args=[self.exam.id]))
+        self.assertContains(response, 'This exam has no questions to regrade against.')
+        self.assertEqual(
+            list(StudentExam.objects.filter(exam=self.exam).order_by('id').values_list('score', flat=True)), old
+        )
+
+
+class QuestionImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(name='BSc')
+        subject = Subject.objects.create(name='Maths', course=course)
+        cls.teacher = User.objects.create_user('teacher')
+        cls.exam = Exam.objects.create(name='Exam', subject=subject, course=course, created_by=cls.teacher)
+
+    def test_csv_upload_reports_invalid_rows(self):
+        rows = [
+            'question_text,option1,option2,option3,option4,correct_option',
+            '2 + 2?,3,4,,,option2',
+            'Capital of France?,Paris,Rome,Berlin,,A',
+            ',missing,text,,,option1',
+            'Empty correct?,a,b,,,D',
+        ]
+        upload = SimpleUploadedFile('questions.csv', '\n'.join(rows).encode())
+        self.client.force_login(self.teacher)
+        response = self.client.post(reverse('teacher_import_questions', args=[self.exam.id]), {'questions_file': upload})
+
+        report = response.context['import_report']
+        self.assertEqual(report.created, 2)
+        self.assertEqual([line for line, _ in report.errors], [4, 5])
+        self.assertEqual(
+            list(Question.objects.filter(exam=self.exam).values_list('correct_option', flat=True)),
+            ['option2', 'option1'],
+        )
+
+    def test_jsonl_command_imports_in_batches(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as handle:
+            for i in range(1200):
+                handle.write(json.dumps({
+                    'question_text': f'Q{i}', 'option1': 'yes', 'option2': 'no', 'correct_option': 'option1'
+                }) + '\n')
+            handle.write('not json\n')
+            handle.flush()
+            out, err = StringIO(), StringIO()
+            call_command('import_questions', self.exam.id, handle.name, stdout=out, stderr=err)
+
+        self.assertEqual(Question.objects.filter(exam=self.exam).count(), 1200)
+        self.assertIn('Line 1201', err.getvalue())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class StudentImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(name='BSc')
+        User.objects.create_user('taken')
+
+    def run_import(self, rows, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as handle:
+            handle.write('username,email,password,course,roll_number\n')
+            handle.write('\n'.join(rows))
+            handle.flush()
+            out, err = StringIO(), StringIO()
+            call_command('import_students', handle.name, *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_hashes_passwords_in_pool(self):
+        out, err = self.run_import([
+            'alice,alice@example.com,secret-1,BSc,R1',
+            'bob,bob@example.com,secret-2,BSc,R2',
+            'taken,t@example.com,x,BSc,R3',
+            'carol,c@example.com,x,MBA,R4',
+            'alice,dup@example.com,x,BSc,R5',
+        ], '--workers', '2', '--batch-size', '1')
+
+        self.assertIn('rows/s', out)
+        self.assertEqual(err.count('Line'), 3)
+        alice = User.objects.get(username='alice')
+        self.assertTrue(alice.check_password('secret-1'))
+        self.assertEqual((alice.profile.course, alice.profile.roll_number), (self.course, 'R1'))
+        self.assertEqual(Profile.objects.filter(role='student').count(), 2)
+
+    def test_require_reset_skips_hashing(self):
+        self.run_import(['dave,d@example.com,secret,BSc,'], '--require-reset')
+        dave = User.objects.get(username='dave')
+        self.assertFalse(dave.has_usable_password())
+        self.assertIsNone(dave.profile.roll_number)
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_imported_student_sets_password_by_reset_link(self):
+        self.run_import(['dave,d@example.com,,BSc,R9'], '--require-reset')
+        self.assertContains(self.client.get(reverse('login')), reverse('password_reset'))
+
+        response = self.client.post(reverse('password_reset'), {'email': 'D@example.com'})
+        self.assertRedirects(response, reverse('password_reset_done'))
+        self.assertEqual(len(mail.outbox), 1)
+        link = re.search(r'https?://[^/]+(/\S+)', mail.outbox[0].body).group(1)
+
+        # The confirm view swaps the token for a session marker and redirects
+        form = self.client.get(link, follow=True)
+        self.assertTrue(form.context['validlink'])
+        response = self.client.post(form.redirect_chain[-1][0], {
+            'new_password1': 'a-new-Passw0rd', 'new_password2': 'a-new-Passw0rd',
+        })
+        self.assertRedirects(response, reverse('password_reset_complete'))
+
+        response = self.client.post(reverse('login'), {'username': 'dave', 'password': 'a-new-Passw0rd'})
+        self.assertRedirects(response, reverse('student_dashboard'), fetch_redirect_response=False)
+
+    def test_reset_links_reach_only_intended_accounts(self):
+        def reset_link_sent(email):
+            mail.outbox.clear()
+            self.client.post(reverse('password_reset'), {'email': email})
+            return len(mail.outbox) == 1
+
+        def account(username, role=None, usable=False, active=True):
+            user = User.objects.create_user(username, f'{username}@example.com', 'secret' if usable else None)
+            user.is_active = active
+            user.save()
+            if role:
+                Profile.objects.create(user=user, role=role, course=self.course)
+
+        account('imported', role='student')
+        account('teacher', role='teacher', usable=True)
+        account('left', role='student', active=False)
+        account('sso', role='teacher')
+        account('external')
+        # Imported students set their first password this way
+        self.assertTrue(reset_link_sent('imported@example.com'))
+        self.assertTrue(reset_link_sent('teacher@example.com'))
+        # Django's rules otherwise: inactive accounts, and accounts that
+        # sign in elsewhere without a password, get no link
+        self.assertFalse(reset_link_sent('left@example.com'))
+        self.assertFalse(reset_link_sent('sso@example.com'))
+        self.assertFalse(reset_link_sent('external@example.com'))
+
+
+class ResultExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(name='BSc')
+        subject = Subject.objects.create(name='Maths', course=course)
+        cls.teacher = User.objects.create_user('teacher')
+        cls.exam = Exam.objects.create(name='Exam', subject=subject, course=course, created_by=cls.teacher)
+        for i in range(5):
+            student = User.objects.create_user(f'student{i}')
+            profile = Profile.objects.create(user=student, role='student', roll_number=f'R{i}')
+            Result.objects.create(student=profile, exam=cls.exam, score=i * 20)
+
+    def test_csv_export_is_streamed(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse('teacher_export_results', args=[self.exam.id]))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'student,roll_number,score,attempted_on')
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[5].startswith('student4,R4,80.0,'))
+
+    async def test_csv_export_streams_asynchronously_under_asgi(self):
+        await self.async_client.aforce_login(self.teacher)
+        response = await self.async_client.get(reverse('teacher_export_results', args=[self.exam.id]))
+        # An async iterator: Django would buffer a sync one into a list
+        self.assertTrue(response.is_async)
+        lines = ''.join([chunk.decode() async for chunk in response.streaming_content]).splitlines()
+        self.assertEqual(lines[0], 'student,roll_number,score,attempted_on')
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[5].startswith('student4,R4,80.0,'))
+
+    @skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet_export_writes_record_batches(self):
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.parquet')
+            call_command('export_results', self.exam.id, path, '--format', 'parquet', '--chunk-size', '2', stderr=StringIO())
+            table = pq.read_table(path)
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.column('score').to_pylist(), [0, 20, 40, 60, 80])
+
+
+class WriteBehindTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(name='BSc')
+        subject = Subject.objects.create(name='Maths', course=course)
+        teacher = User.objects.create_user('teacher')
+        cls.exam = Exam.objects.create(name='Exam', subject=subject, course=course, created_by=teacher)
+        cls.question = Question.objects.create(
+            exam=cls.exam, question_text='Q', option1='a', option2='b', correct_option='option1'
+        )
+        cls.student = User.objects.create_user('student')
+        cls.profile = Profile.objects.create(user=cls.student, role='student', course=course)
+
+    def setUp(self):
+        clear_caches()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        # A long interval keeps the background thread from flushing during the test
+        settings = override_settings(EXAM_WRITE_BEHIND=True, EXAM_JOURNAL_DIR=self.directory, EXAM_FLUSH_INTERVAL=3600)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(writebehind.shutdown, flush=False)
+
+    def test_submission_is_journaled_then_flushed_in_a_batch(self):
+        self.client.force_login(self.student)
+        url = reverse('student_take_exam', args=[self.exam.id])
+        self.client.get(url)
+        self.client.post(reverse('student_autosave_exam', args=[self.exam.id]), {str(self.question.id): 'option2'})
+        self.client.post(url, {str(self.question.id): 'option1'})
+
+        attempt = StudentExam.objects.get(student=self.student, exam=self.exam)
+        self.assertFalse(attempt.is_submitted)
+        self.assertTrue(writebehind.is_pending(attempt.pk))
+        self.assertEqual(writebehind.read_segment(writebehind.get_write_behind().path)[0]['score'], 100)
+        # Already counted as submitted before it reaches the database
+        self.assertEqual(self.client.post(url, {}).context['error'], 'You have already completed this exam.')
+
+        writebehind.get_write_behind().flush()
+        attempt.refresh_from_db()
+        self.assertTrue(attempt.is_submitted)
+        self.assertEqual(attempt.score, 100)
+        self.assertEqual(bytes(attempt.responses), b'\x01')
+        self.assertEqual(Result.objects.get(exam=self.exam).score, 100)
+        self.assertEqual(ExamStatistics.objects.get(exam=self.exam).count, 1)
+        self.assertFalse(writebehind.is_pending(attempt.pk))
+        self.assertFalse(AnswerDraft.objects.exists())
+
+    def test_second_submission_from_another_worker_is_rejected(self):
+        self.client.force_login(self.student)
+        url = reverse('student_take_exam', args=[self.exam.id])
+        self.client.get(url)
+        self.client.post(url, {str(self.question.id): 'option1'})
+        journal = writebehind.get_write_behind()
+        attempt = StudentExam.objects.get(student=self.student, exam=self.exam)
+
+        # Another worker: it shares the cache but not this process's pending set
+        journal.pending.clear()
+        self.assertTrue(writebehind.is_pending(attempt.pk))
+        self.assertEqual(self.client.get(url).context['error'], 'You have already completed this exam.')
+        response = self.client.post(reverse('student_submit_exam', args=[self.exam.id]), {str(self.question.id): 'option2'})
+        self.assertEqual(response.context['error'], 'You have already completed this exam.')
+        # Even if its pre-check raced the first submission, the claim refuses it
+        self.assertFalse(submit_answers(attempt, self.profile, get_answer_key(self.exam.id), {str(self.question.id): 'option2'}))
+        self.assertEqual(len(writebehind.read_segment(journal.path)), 1)
+
+        journal.flush()
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 100)
+
+    def test_orphaned_journal_is_replayed_once(self):
+        attempt = StudentExam.objects.create(student=self.student, exam=self.exam)
+        record = {'student_exam': attempt.pk, 'profile': self.profile.pk, 'exam': self.exam.id, 'score': 40}
+        path = os.path.join(self.directory, f'1-1{writebehind.SEGMENT_SUFFIX}')
+        with open(path, 'w') as segment:
+            # The same submission twice, then a line torn by the crash
+            segment.write(json.dumps(record) + '\n' + json.dumps(dict(record, score=90)) + '\n{"stud')
+
+        out = StringIO()
+        call_command('replay_submissions', stdout=out)
+        self.assertIn('Replayed 1 submission', out.getvalue())
+        self.assertFalse(os.path.exists(path))
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 40)
+        self.assertEqual(Result.objects.filter(exam=self.exam).count(), 1)
+        self.assertEqual(writebehind.apply_submissions([record]), 0)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LoadTestHarnessTests(TransactionTestCase):
+    def test_cohort_submits_through_wsgi_app(self):
+        from myproject.wsgi import application
+
+        cohort = seed_cohort('lt', students=4, questions=5)
+        # One session at a time: the in-memory test database locks whole tables
+        report = LoadTest(application, cohort, concurrency=1).run()
+
+        summaries = report.summaries()
+        self.assertEqual(summaries['student_take_exam POST']['requests'], 4)
+        self.assertFalse(any(row['errors'] for row in summaries.values()))
+        self.assertEqual(StudentExam.objects.filter(exam=cohort.exam, is_submitted=True).count(), 4)
+
+        cohort.delete()
+        self.assertFalse(User.objects.filter(username__startswith='lt-').exists())
+
+    def test_cohort_submits_through_asgi_app(self):
+        from myproject.asgi import application
+
+        cohort = seed_cohort('alt', students=4, questions=5)
+        report = AsyncLoadTest(application, cohort, concurrency=1).run()
+
+        summaries = report.summaries()
+        self.assertEqual(summaries['student_submit_exam POST']['requests'], 4)
+        self.assertFalse(any(row['errors'] or row['lock_errors'] for row in summaries.values()))
+        self.assertEqual(StudentExam.objects.filter(exam=cohort.exam, is_submitted=True).count(), 4)
+        cohort.delete()
+
+    @override_settings(PASSWORD_HASHERS=['accounts.hashers.TunablePBKDF2PasswordHasher'])
+    def test_login_benchmark(self):
+        out = StringIO()
+        call_command('bench_login', '--students', '3', '--iterations', '1000', '2000', '--concurrency', '1', stdout=out)
+        # iterations, hash ms, logins, errors, ...
+        rows = [line.split() for line in out.getvalue().splitlines()[-2:]]
+        self.assertEqual([(row[0], row[2], row[3]) for row in rows], [('1000', '3', '0'), ('2000', '3', '0')])
+        self.assertFalse(User.objects.filter(username__startswith='benchlogin-').exists())
+
+    def test_lock_errors_are_recognised_on_every_backend(self):
+        def wrapped(cause):
+            # As django.db.utils.DatabaseErrorWrapper re-raises driver errors
+            error = OperationalError(*cause.args)
+            error.__cause__ = cause
+            return error
+
+        class SerializationFailure(Exception):
+            sqlstate = '40001'
+
+        class Psycopg2Error(Exception):
+            pgcode = '40P01'
+
+        class LockNotAvailable(Exception):
+            pass
+
+        self.assertTrue(is_lock_error(OperationalError('database is locked')))
+        self.assertTrue(is_lock_error(wrapped(SerializationFailure('could not serialize access'))))
+        self.assertTrue(is_lock_error(wrapped(Psycopg2Error('deadlock detected'))))
+        self.assertTrue(is_lock_error(wrapped(LockNotAvailable('could not obtain lock'))))
+        self.assertTrue(is_lock_error(wrapped(Exception(1213, 'Deadlock found'))))
+        self.assertFalse(is_lock_error(OperationalError('no such table: accounts_exam')))
+        self.assertFalse(is_lock_error(ValueError('locked')))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class HTTPLoadTestTests(LiveServerTestCase):
+    def test_cohort_submits_to_a_live_server(self):
+        cohort = seed_cohort('http', students=3, questions=3)
+        address = urlsplit(self.live_server_url)
+        report = HTTPLoadTest((address.hostname, address.port), cohort, concurrency=1).run()
+
+        self.assertFalse(any(row['errors'] for row in report.summaries().values()))
+        self.assertEqual(StudentExam.objects.filter(exam=cohort.exam, is_submitted=True).count(), 3)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ExplainViewsTests(TestCase):
+    def test_prints_plans_and_rolls_back(self):
+        out = StringIO()
+        call_command('explain_views', '--cohorts', '2', '--students', '5', '--questions', '3', stdout=out)
+        self.assertIn('student_history', out.getvalue())
+        self.assertIn('Full table scans', out.getvalue())
+        self.assertFalse(Course.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class PageWeightTests(TestCase):
+    def test_templates_are_benchmarked(self):
+        out = StringIO()
+        call_command('bench_templates', '--students', '2', '--repeat', '2', stdout=out)
+        self.assertIn('accounts/student_exams.html', out.getvalue())
+        self.assertEqual(len(out.getvalue().splitlines()), 10)
+
+    def test_pages_link_their_stylesheets(self):
+        out = StringIO()
+        call_command('page_weight', '--students', '2', '--repeat', '1', stdout=out)
+        rows = {line.split()[0]: line.split()[1:] for line in out.getvalue().splitlines()[1:10]}
+        self.assertEqual(len(rows), 9)
+        for page, (html, html_gzipped, css, css_gzipped, elapsed) in rows.items():
+            with self.subTest(page=page):
+                self.assertGreater(int(css), 0)
+        self.assertFalse(Course.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ViewRegressionTests(TestCase):
+    """
+    Every view is requested against a small and a large cohort; the
+    number of queries must not depend on how much data there is.
+    """
+    SIZES = {'small': 10, 'large': 1000}
+    timings = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cohorts = {}
+        for prefix, size in cls.SIZES.items():
+            cohort = seed_cohort(prefix, students=size + 2, questions=10, submitted=size)
+            # The first student's history also grows with the data set
+            student = User.objects.get(username=f'{prefix}-student-0')
+            exams = Exam.objects.bulk_create([
+                Exam(name=f'{prefix} extra {i}', subject=cohort.exam.subject, course=cohort.course,
+                     created_by=cohort.teacher)
+                for i in range(size // 10)
+            ])
+            StudentExam.objects.bulk_create([
+                StudentExam(student=student, exam=exam, score=50, is_submitted=True) for exam in exams
+            ])
+            cls.cohorts[prefix] = cohort
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.environ.get('PRINT_VIEW_TIMINGS'):
+            for (view, prefix), elapsed in sorted(cls.timings.items()):
+                sys.stderr.write(f'{view:<28}{prefix:<8}{elapsed * 1000:8.1f} ms\n')
+        super().tearDownClass()
+
+    def view_requests(self, prefix):
+        cohort = self.cohorts[prefix]
+        size = self.SIZES[prefix]
+        teacher = cohort.teacher
+        student = User.objects.get(username=f'{prefix}-student-0')
+        newcomer = User.objects.get(username=f'{prefix}-student-{size}')
+        latecomer = User.objects.get(username=f'{prefix}-student-{size + 1}')
+        exam_id = cohort.exam.id
+        upload = SimpleUploadedFile(
+            'questions.csv', b'question_text,option1,option2,correct_option\nQ,a,b,option1\n'
+        )
+
+        return [
+            ('login GET', None, 'get', reverse('login'), None),
+            ('login POST', None, 'post', reverse('login'), {'username': newcomer.username, 'password': cohort.password}),
+            ('logout', student, 'get', reverse('logout'), None),
+            ('teacher_dashboard', teacher, 'get', reverse('teacher_dashboard'), None),
+            ('teacher_submissions_feed', teacher, 'get', reverse('teacher_submissions_feed'), None),
+            ('teacher_create_exam', teacher, 'get', reverse('teacher_create_exam'), None),
+            ('teacher_exam_detail', teacher, 'get', reverse('teacher_exam_detail', args=[exam_id]), None),
+            ('teacher_import_questions', teacher, 'post', reverse('teacher_import_questions', args=[exam_id]),
+             {'questions_file': upload}),
+            ('teacher_exam_results', teacher, 'get', reverse('teacher_exam_results', args=[exam_id]), None),
+            ('teacher_export_results', teacher, 'get', reverse('teacher_export_results', args=[exam_id]), None),
+            ('teacher_item_analysis', teacher, 'get', reverse('teacher_item_analysis', args=[exam_id]), None),
+            ('teacher_regrade_exam', teacher, 'post', reverse('teacher_regrade_exam', args=[exam_id]),
+             {'dry_run': '1'}),
+            ('teacher_student', teacher, 'get', reverse('teacher_student'), None),
+            ('student_dashboard', student, 'get', reverse('student_dashboard'), None),
+            ('student_history', student, 'get', reverse('student_history'), None),
+            ('student_take_exam GET', newcomer, 'get', reverse('student_take_exam', args=[exam_id]), None),
+            ('student_autosave_exam', newcomer, 'post', reverse('student_autosave_exam', args=[exam_id]),
+             {str(question_id): 'option1' for question_id in get_answer_key(exam_id).question_ids[:3]}),
+            ('student_take_exam POST', newcomer, 'post', reverse('student_take_exam', args=[exam_id]), {}),
+            ('student_submit_exam', latecomer, 'post', reverse('student_submit_exam', args=[exam_id]), {}),
+        ]
+
+    def measure(self, user, method, url, data):
+        self.client.logout()
+        if user is not None:
+            self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        self.assertLess(response.status_code, 400)
+        return len(ctx), elapsed
+
+    def test_query_counts_do_not_grow_with_data(self):
+        measured = {}
+        for prefix in self.SIZES:
+            clear_caches()
+            for view, user, method, url, data in self.view_requests(prefix):
+                queries, elapsed = self.measure(user, method, url, data)
+                measured[view, prefix] = queries
+                self.timings[view, prefix] = elapsed
+
+        for view, *_ in self.view_requests('small'):
+            with self.subTest(view=view):
+                self.assertEqual(measured[view, 'large'], measured[view, 'small'])
+                self.assertLess(self.timings[view, 'large'], VIEW_TIME_BUDGET)
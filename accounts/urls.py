@@ -1,20 +1,50 @@
-from django.urls import path
+from django.contrib.auth import views as auth_views
+from django.urls import path, reverse_lazy
+
 from . import views
+from .forms import StudentPasswordResetForm
 
 urlpatterns = [
     path('login/', views.login, name='login'),
     path('logout/', views.logout_view, name='logout'),
 
+    # Password reset (also how imported students set their first password)
+    path('password-reset/', auth_views.PasswordResetView.as_view(
+        form_class=StudentPasswordResetForm,
+        template_name='accounts/password_reset.html',
+        success_url=reverse_lazy('password_reset_done'),
+    ), name='password_reset'),
+    path('password-reset/sent/', auth_views.PasswordResetDoneView.as_view(
+        template_name='accounts/password_reset.html',
+        extra_context={'step': 'sent'},
+    ), name='password_reset_done'),
+    path('password-reset/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(
+        template_name='accounts/password_reset.html',
+        success_url=reverse_lazy('password_reset_complete'),
+    ), name='password_reset_confirm'),
+    path('password-reset/done/', auth_views.PasswordResetCompleteView.as_view(
+        template_name='accounts/password_reset.html',
+        extra_context={'step': 'complete'},
+    ), name='password_reset_complete'),
+
     # Teacher
     path('teacher/', views.teacher_dashboard, name='teacher_dashboard'),
+    path('teacher/submissions/', views.teacher_submissions_feed, name='teacher_submissions_feed'),
     path('teacher/create/', views.teacher_create_exam, name='teacher_create_exam'),
     path('teacher/exam/<int:exam_id>/', views.teacher_exam_detail, name='teacher_exam_detail'),
+    path('teacher/exam/<int:exam_id>/import/', views.teacher_import_questions, name='teacher_import_questions'),
     path('teacher/exam/<int:exam_id>/results/', views.teacher_exam_results, name='teacher_exam_results'),
+    path('teacher/exam/<int:exam_id>/results/export/', views.teacher_export_results, name='teacher_export_results'),
+    path('teacher/exam/<int:exam_id>/regrade/', views.teacher_regrade_exam, name='teacher_regrade_exam'),
+    path('teacher/exam/<int:exam_id>/items/', views.teacher_item_analysis, name='teacher_item_analysis'),
     path('teacher/students/', views.teacher_student, name='teacher_student'),
+    path('teacher/students/feed/', views.teacher_student_feed, name='teacher_student_feed'),
 
 
     # Student
     path('student/', views.student_dashboard, name='student_dashboard'),
     path('student/exam/<int:exam_id>/', views.student_take_exam, name='student_take_exam'),
+    path('student/exam/<int:exam_id>/submit/', views.student_submit_exam, name='student_submit_exam'),
+    path('student/exam/<int:exam_id>/autosave/', views.student_autosave_exam, name='student_autosave_exam'),
     path('student/history/', views.student_history, name='student_history'),
 ]
@@ -1,35 +1,62 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.contrib.auth import aauthenticate, alogin, logout as auth_logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-
-from .models import Profile, Course, Subject, Exam, Question, StudentExam, Result
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
+
+from .models import Profile, Course, Subject, Exam, Question, StudentExam, Result, ExamStatistics
+from .caching import get_exam_paper
+from .decorators import teacher_required
+from .drafts import autosave, draft_answers
+from .exports import aiter_csv, iter_csv
+from .grading import get_answer_key
+from .importers import detect_format, import_questions
+from .middleware import aget_profile
+from .pagination import keyset_paginate, keyset_paginate_any
+from . import writebehind
+
+# Rows per page of the teacher's recent submissions feed
+FEED_PAGE_SIZE = 20
+
+# Rows per page of the student roster, in the order of its index
+ROSTER_PAGE_SIZE = 50
+ROSTER_ORDERING = ['course_id', 'roll_number', 'id']
 
 
 # ===== Login (FIXED FOR FIRST-TIME LOGIN) =====
-def login(request):
+async def login(request):
+    """
+    One joined lookup loads the user, profile and course. The view is
+    async so that under ASGI password hashing runs in a thread pool rather
+    than on a request worker.
+    """
     if request.method == 'POST':
         username = request.POST.get('username')
         password = request.POST.get('password')
 
-        if not User.objects.filter(username=username).exists():
-            return render(request, 'accounts/login.html', {'error': 'Invalid username'})
-
-        user = authenticate(request, username=username, password=password)
+        user = await aauthenticate(request, username=username, password=password)
         if user is None:
-            return render(request, 'accounts/login.html', {'error': 'Invalid password'})
-
-        auth_login(request, user)
-        
-        # Create profile if it doesn't exist (FIX FOR FIRST-TIME LOGIN)
-        if not hasattr(user, 'profile'):
-            Profile.objects.create(user=user, role='student', approved=True)
-        
-        if hasattr(user, 'profile') and user.profile.role == 'teacher':
+            # Only a failed login pays for telling the two cases apart
+            if username and await User.objects.filter(username=username).aexists():
+                error = 'Invalid password'
+            else:
+                error = 'Invalid username'
+            return await sync_to_async(render)(request, 'accounts/login.html', {'error': error})
+
+        await alogin(request, user)
+
+        # Creates the profile on first login (FIX FOR FIRST-TIME LOGIN)
+        profile = await aget_profile(user)
+        if profile.role == 'teacher':
             return redirect('teacher_dashboard')
         return redirect('student_dashboard')
 
-    return render(request, 'accounts/login.html')
+    return await sync_to_async(render)(request, 'accounts/login.html')
 
 
 # ===== Logout =====
@@ -38,51 +65,49 @@ def logout_view(request):
     return redirect('login')
 
 
+# Submitted attempts on exams created by a teacher
+def teacher_submissions(teacher):
+    return StudentExam.objects.filter(
+        exam__created_by=teacher,
+        is_submitted=True
+    ).select_related('student', 'exam')
+
+
 # ===== Teacher dashboard (ENHANCED WITH ANALYSIS) =====
 @login_required
 def teacher_dashboard(request):
-    # Get all exams created by this teacher
-    exams = Exam.objects.filter(created_by=request.user).order_by('-id')
+    # Get all exams created by this teacher, with their running statistics
+    exams = Exam.objects.filter(created_by=request.user).select_related(
+        'subject', 'statistics'
+    ).defer('statistics__score_index').order_by('-id')
     
     # Calculate statistics
     total_students = Profile.objects.filter(role='student', approved=True).count()
     
-    completed_exams = StudentExam.objects.filter(
-        exam__created_by=request.user, 
-        is_submitted=True
-    ).count()
-    
-    all_scores = StudentExam.objects.filter(
-        exam__created_by=request.user, 
-        is_submitted=True, 
-        score__isnull=False
-    )
-    
-    if all_scores.exists():
-        scores = [s.score for s in all_scores if s.score is not None]
-        average_score = round(sum(scores) / len(scores), 1) if scores else 0
-    else:
-        average_score = 0
-    
     # ENHANCED ANALYSIS DATA (NEW - FOR ANALYSIS BACKEND)
-    total_exams = exams.count()
-    active_exams = exams.filter(is_active=True) 
+    total_exams = len(exams)
+    active_exams = [exam for exam in exams if exam.is_active]
     
     # Get per-exam statistics for analysis
     exam_stats = []
+    completed_exams = 0
+    total_score = 0
     for exam in exams:
-        exam_submissions = StudentExam.objects.filter(exam=exam, is_submitted=True)
-        exam_scores = [s.score for s in exam_submissions if s.score is not None]
+        stats = getattr(exam, 'statistics', None) or ExamStatistics(exam=exam)
+        completed_exams += stats.count
+        total_score += stats.total
         
         exam_stats.append({
             'exam': exam,
-            'submissions': exam_submissions.count(),
-            'average': round(sum(exam_scores) / len(exam_scores), 1) if exam_scores else 0,
-            'highest': max(exam_scores) if exam_scores else 0,
-            'lowest': min(exam_scores) if exam_scores else 0,
-            'pass_rate': round(len([s for s in exam_scores if s >= 60]) / len(exam_scores) * 100, 1) if exam_scores else 0
+            'submissions': stats.count,
+            'average': round(stats.mean, 1),
+            'highest': stats.max_score or 0,
+            'lowest': stats.min_score or 0,
+            'pass_rate': stats.pass_percentage
         })
     
+    average_score = round(total_score / completed_exams, 1) if completed_exams else 0
+    
     # Top performing students
     top_students = StudentExam.objects.filter(
         exam__created_by=request.user,
@@ -90,11 +115,10 @@ def teacher_dashboard(request):
         score__isnull=False
     ).select_related('student', 'exam').order_by('-score')[:5]
     
-    # Recent activity
-    recent_submissions = StudentExam.objects.filter(
-        exam__created_by=request.user,
-        is_submitted=True
-    ).select_related('student', 'exam').order_by('-id')
+    # Recent activity (first page only, the rest is loaded on scroll)
+    recent_submissions, next_cursor = keyset_paginate(
+        teacher_submissions(request.user), ['-id'], size=FEED_PAGE_SIZE
+    )
     
     context = {
         'exams': exams,
@@ -106,16 +130,39 @@ def teacher_dashboard(request):
         'exam_stats': exam_stats,
         'top_students': top_students,
         'recent_submissions': recent_submissions,
+        'next_cursor': next_cursor,
     }
     
     return render(request, 'accounts/teacher_dashboard.html', context)
 
 
+# ===== Recent submissions feed (JSON, for infinite scroll) =====
+@login_required
+def teacher_submissions_feed(request):
+    submissions, next_cursor = keyset_paginate(
+        teacher_submissions(request.user), ['-id'],
+        cursor=request.GET.get('cursor'), size=FEED_PAGE_SIZE
+    )
+    
+    return JsonResponse({
+        'results': [
+            {
+                'id': submission.id,
+                'student': submission.student.username,
+                'exam': submission.exam.name,
+                'score': submission.score,
+            }
+            for submission in submissions
+        ],
+        'next': next_cursor,
+    })
+
+
 # ===== Create Exam (FIXED - TIME FIELDS NOW OPTIONAL) =====
 @login_required
 def teacher_create_exam(request):
     courses = Course.objects.all()
-    subjects = Subject.objects.all()
+    subjects = Subject.objects.select_related('course')
     
     if request.method == 'POST':
         name = request.POST['name']
@@ -170,14 +217,38 @@ def teacher_exam_detail(request, exam_id):
     return render(request, 'accounts/teacher_exam_detail.html', {'exam': exam, 'questions': questions})
 
 
+# ===== Bulk Import Questions (CSV / JSON Lines upload) =====
+@login_required
+def teacher_import_questions(request, exam_id):
+    exam = get_object_or_404(Exam, id=exam_id, created_by=request.user)
+    
+    if request.method != 'POST':
+        return redirect('teacher_exam_detail', exam_id=exam.id)
+    
+    upload = request.FILES.get('questions_file')
+    import_error = None
+    report = None
+    
+    if upload is None:
+        import_error = 'Choose a file to import.'
+    else:
+        try:
+            report = import_questions(exam, upload, detect_format(upload.name))
+        except ValueError as error:
+            import_error = str(error)
+    
+    return render(request, 'accounts/teacher_exam_detail.html', {
+        'exam': exam,
+        'questions': Question.objects.filter(exam=exam),
+        'import_report': report,
+        'import_error': import_error,
+    })
+
+
 # ===== Student dashboard (FIXED FOR "NO EXAM YET") =====
 @login_required
 def student_dashboard(request):
-    # Ensure profile exists
-    if not hasattr(request.user, 'profile'):
-        Profile.objects.create(user=request.user, role='student', approved=True)
-    
-    profile = request.user.profile
+    profile = request.profile
     
     # Get exams for student's course (FIX FOR "NO EXAM YET")
     if profile.course:
@@ -213,25 +284,21 @@ def student_dashboard(request):
 # ===== Take Exam (COMPLETELY FIXED - NO TIME RESTRICTION) =====
 @login_required
 def student_take_exam(request, exam_id):
-    exam = get_object_or_404(Exam, id=exam_id)
-    
-    # Ensure profile exists
-    if not hasattr(request.user, 'profile'):
-        Profile.objects.create(user=request.user, role='student', approved=True)
+    exam = get_object_or_404(Exam.objects.select_related('subject'), id=exam_id)
     
-    profile = request.user.profile
+    profile = request.profile
 
     # Check if exam belongs to student's course (FIX FOR ACCESS CONTROL)
-    if profile.course and exam.subject.course != profile.course:
+    if profile.course_id and exam.subject.course_id != profile.course_id:
         return render(request, 'accounts/student_exams.html', {
             'error': 'You cannot take this exam - it is not for your course.',
             'exams': Exam.objects.filter(subject__course=profile.course, is_active=True)
         })
 
     # Get questions (FIX FOR "NO QUESTIONS")
-    questions = Question.objects.filter(exam=exam)
+    answer_key = get_answer_key(exam.id, exam.questions_version)
     
-    if not questions.exists():
+    if not len(answer_key):
         return render(request, 'accounts/student_exams.html', {
             'error': 'This exam has no questions yet. Please check back later.',
             'exams': Exam.objects.filter(subject__course=profile.course, is_active=True)
@@ -244,7 +311,7 @@ def student_take_exam(request, exam_id):
     )
     
     # Check if already submitted
-    if student_exam.is_submitted:
+    if student_exam.is_submitted or writebehind.is_pending(student_exam.pk):
         return render(request, 'accounts/student_exams.html', {
             'error': 'You have already completed this exam.',
             'exams': Exam.objects.filter(subject__course=profile.course, is_active=True)
@@ -254,62 +321,149 @@ def student_take_exam(request, exam_id):
 
     # Handle form submission
     if request.method == 'POST':
-        score = 0
-        total_questions = questions.count()
-        
-        for question in questions:
-            answer = request.POST.get(str(question.id))
-            if answer == question.correct_option:
-                score += 1
-        
-        # Calculate percentage
-        percentage_score = (score / total_questions * 100) if total_questions > 0 else 0
-        
-        student_exam.score = percentage_score
-        student_exam.is_submitted = True
-        
-        student_exam.save()
-        
-        # Also save to Result model for consistency
+        if not submit_answers(student_exam, profile, answer_key, request.POST):
+            return render(request, 'accounts/student_exams.html', {
+                'error': 'You have already completed this exam.',
+                'exams': Exam.objects.filter(subject__course=profile.course, is_active=True)
+            })
+        return redirect('student_history')
+
+    # Render exam page (the question pieces are cached per exam and put
+    # in this attempt's own shuffled order)
+    return render(request, 'accounts/student_exams.html', {
+        'exam': exam, 
+        'question_count': len(answer_key),
+        'paper': get_exam_paper(exam.id, student_exam.paper_seed, exam.questions_version),
+        'saved_answers': draft_answers(student_exam, answer_key),
+    })
+
+
+def submit_answers(student_exam, profile, answer_key, answers):
+    """
+    Grade the submitted answers and record the attempt and its result in
+    one transaction; returns False if the attempt was already submitted.
+    The page posts only the answers changed since the last autosave; they
+    are merged into the autosaved draft, which is read through its stored
+    layout. The draft is removed with the submission.
+    """
+    answers = {**draft_answers(student_exam, answer_key), **dict(answers.items())}
+    score = answer_key.grade(answers)
+    total_questions = len(answer_key)
+    # Kept per question for item analysis
+    responses = answer_key.pack(answers)
+
+    # Calculate percentage
+    percentage_score = (score / total_questions * 100) if total_questions > 0 else 0
+
+    if writebehind.enabled():
+        # Another worker may have journaled this attempt already
+        if not writebehind.claim(student_exam.pk):
+            return False
+        # Durable once journaled; the database is updated in the next batch
+        try:
+            writebehind.get_write_behind().append(
+                student_exam, profile, percentage_score, responses, answer_key.layout
+            )
+        except Exception:
+            writebehind.release(student_exam.pk)
+            raise
+        return True
+
+    with transaction.atomic():
+        if not student_exam.submit_exam(percentage_score, responses, answer_key.layout):
+            return False
+
+        # Result mirrors the attempt's score and is only written with it
         Result.objects.create(
             student=profile,
-            exam=exam,
+            exam=student_exam.exam,
             score=percentage_score
         )
-        
-        return redirect('student_history')
+    return True
 
-    # Render exam page
-    return render(request, 'accounts/student_exams.html', {
-        'exam': exam, 
-        'questions': questions
+
+# ===== Autosave Answers =====
+@login_required
+@require_POST
+def student_autosave_exam(request, exam_id):
+    """
+    Changed answers, posted in debounced batches by the exam page
+    """
+    student_exam = StudentExam.objects.filter(
+        student=request.user, exam_id=exam_id, is_submitted=False
+    ).first()
+    if student_exam is None or writebehind.is_pending(student_exam.pk):
+        return JsonResponse({'error': 'This exam is not in progress.'}, status=409)
+
+    answered = autosave(student_exam, get_answer_key(exam_id), request.POST)
+    return JsonResponse({'answered': answered})
+
+
+# ===== Async Exam Submission (non-blocking under ASGI) =====
+async def exam_unavailable(request, profile, message):
+    return await sync_to_async(render)(request, 'accounts/student_exams.html', {
+        'error': message,
+        'exams': Exam.objects.filter(subject__course=profile.course_id, is_active=True)
     })
 
 
+@login_required
+@require_POST
+async def student_submit_exam(request, exam_id):
+    """
+    The exam form posts here. Lookups use the async ORM, and grading plus
+    the write transaction run in a worker thread, so the event loop keeps
+    serving other requests while the database works.
+    """
+    user = await request.auser()
+    exam = await aget_object_or_404(Exam.objects.select_related('subject'), id=exam_id)
+
+    profile = await aget_profile(user)
+
+    if profile.course_id and exam.subject.course_id != profile.course_id:
+        return await exam_unavailable(request, profile, 'You cannot take this exam - it is not for your course.')
+
+    answer_key = await sync_to_async(get_answer_key)(exam.id, exam.questions_version)
+    if not len(answer_key):
+        return await exam_unavailable(request, profile, 'This exam has no questions yet. Please check back later.')
+
+    student_exam, created = await StudentExam.objects.aget_or_create(student=user, exam=exam)
+    if student_exam.is_submitted or writebehind.is_pending(student_exam.pk):
+        return await exam_unavailable(request, profile, 'You have already completed this exam.')
+
+    if not await sync_to_async(submit_answers)(student_exam, profile, answer_key, request.POST):
+        return await exam_unavailable(request, profile, 'You have already completed this exam.')
+    return redirect('student_history')
+
+
 # ===== Student Exam History (ENHANCED) =====
 @login_required
 def student_history(request):
-    records = StudentExam.objects.filter(student=request.user, is_submitted=True).order_by('-id')
+    # One query: the attempts with their exams and each exam's score index
+    records = list(
+        StudentExam.objects.filter(student=request.user, is_submitted=True)
+        .select_related('exam__subject', 'exam__statistics')
+        .order_by('-id')
+    )
     
     # Calculate statistics
-    completed_records = records.filter(is_submitted=True)
+    scores = [r.score for r in records if r.score is not None]
     
-    if completed_records.exists():
-        scores = [r.score for r in completed_records if r.score is not None]
-        
-        if scores:
-            average_score = round(sum(scores) / len(scores), 1)
-            highest_score = max(scores)
-            passing_count = len([s for s in scores if s >= 60])
-        else:
-            average_score = 0
-            highest_score = 0
-            passing_count = 0
+    if scores:
+        average_score = round(sum(scores) / len(scores), 1)
+        highest_score = max(scores)
+        passing_count = len([s for s in scores if s >= 60])
     else:
         average_score = 0
         highest_score = 0
         passing_count = 0
     
+    # Rank within each exam, from its score index in O(log n)
+    for record in records:
+        stats = getattr(record.exam, 'statistics', None)
+        if stats is not None and stats.count and record.score is not None:
+            record.standing = stats.standing(record.score)
+    
     context = {
         'records': records,
         'average_score': average_score,
@@ -324,80 +478,162 @@ def student_history(request):
 @login_required
 def teacher_exam_results(request, exam_id):
     # FIX: Changed 'deleted_by' to 'created_by' - this was causing the error
-    exam = get_object_or_404(Exam, id=exam_id, created_by=request.user)
-    
+    exam = get_object_or_404(
+        Exam.objects.select_related('statistics').defer('statistics__score_index'),
+        id=exam_id, created_by=request.user
+    )
+    return render_exam_results(request, exam)
+
+
+def render_exam_results(request, exam, **extra):
     # Get results from both StudentExam and Result models for comprehensive view
     student_exams = StudentExam.objects.filter(exam=exam, is_submitted=True).select_related('student', 'student__profile')
     results = Result.objects.filter(exam=exam).select_related('student', 'student__user')
     
-    # Calculate exam statistics
-    if student_exams.exists():
-        scores = [se.score for se in student_exams if se.score is not None]
-        if scores:
-            exam_stats = {
-                'total_attempts': student_exams.count(),
-                'average_score': round(sum(scores) / len(scores), 1),
-                'highest_score': max(scores),
-                'lowest_score': min(scores),
-                'pass_count': len([s for s in scores if s >= 60]),
-                'fail_count': len([s for s in scores if s < 60]),
-                'pass_percentage': round(len([s for s in scores if s >= 60]) / len(scores) * 100, 1) if scores else 0
-            }
-        else:
-            exam_stats = {
-                'total_attempts': 0,
-                'average_score': 0,
-                'highest_score': 0,
-                'lowest_score': 0,
-                'pass_count': 0,
-                'fail_count': 0,
-                'pass_percentage': 0
-            }
-    else:
-        exam_stats = {
-            'total_attempts': 0,
-            'average_score': 0,
-            'highest_score': 0,
-            'lowest_score': 0,
-            'pass_count': 0,
-            'fail_count': 0,
-            'pass_percentage': 0
-        }
+    # Exam statistics are maintained on every submission
+    try:
+        stats = exam.statistics
+    except ExamStatistics.DoesNotExist:
+        stats = ExamStatistics.rebuild(exam.id)
+    exam_stats = stats.as_dict()
     
     return render(request, 'accounts/teacher_exam_results.html', {
         'exam': exam, 
         'results': results,
         'student_exams': student_exams,
-        'exam_stats': exam_stats
+        'exam_stats': exam_stats,
+        **extra,
     })
 
 
+# ===== Regrade =====
+@login_required
+def teacher_regrade_exam(request, exam_id):
+    # NumPy is only loaded by the workers that regrade
+    from .regrading import regrade_exam
+
+    exam = get_object_or_404(Exam, id=exam_id, created_by=request.user)
+    
+    if request.method != 'POST':
+        return redirect('teacher_exam_results', exam_id=exam.id)
+    
+    try:
+        report = regrade_exam(exam.id, dry_run=request.POST.get('dry_run') == '1')
+    except ValueError as error:
+        return render_exam_results(request, exam, regrade_error=str(error))
+    # The statistics were rebuilt, so read them again
+    exam = Exam.objects.select_related('statistics').defer('statistics__score_index').get(id=exam.id)
+    return render_exam_results(request, exam, regrade_report=report)
+
 
 
 
 
+# ===== Item Analysis =====
 @login_required
-def teacher_student(request):
-    # Only teachers allowed
-    if not hasattr(request.user, 'profile') or request.user.profile.role != 'teacher':
-        return redirect('login')
+def teacher_item_analysis(request, exam_id):
+    # NumPy is only loaded by the workers that serve this report
+    from .analysis import item_analysis, item_rows, response_matrix
+
+    exam = get_object_or_404(Exam, id=exam_id, created_by=request.user)
+    answer_key = get_answer_key(exam.id, exam.questions_version)
+    choices, skipped = response_matrix(answer_key)
+    analysis = item_analysis(choices, answer_key.correct)
+    question_texts = dict(Question.objects.filter(exam=exam).values_list('id', 'question_text'))
+
+    return render(request, 'accounts/teacher_item_analysis.html', {
+        'exam': exam,
+        'items': item_rows(analysis, answer_key, question_texts),
+        'students': analysis['students'],
+        'skipped': skipped,
+        'kr20': analysis['kr20'],
+    })
+
+
+# ===== Export Exam Results (streamed CSV) =====
+@login_required
+def teacher_export_results(request, exam_id):
+    exam = get_object_or_404(Exam, id=exam_id, created_by=request.user)
+    
+    # Under ASGI a sync iterator would be read whole before the first byte
+    rows = aiter_csv(exam.id) if isinstance(request, ASGIRequest) else iter_csv(exam.id)
+    response = StreamingHttpResponse(rows, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="exam-{exam.id}-results.csv"'
+    return response
+
 
-    teacher = request.user
 
-    # Get all courses where this teacher has created exams
-    teacher_courses = Course.objects.filter(
-        subject__exam__created_by=teacher
-    ).distinct()
 
-    # Get all students enrolled in those courses
+# Approved students in the courses a teacher sets exams for, optionally
+# narrowed to one course
+def teacher_roster(teacher, course_id=None):
+    course_ids = Exam.objects.filter(created_by=teacher).values('subject__course_id')
     students = Profile.objects.filter(
         role='student',
         approved=True,
-        course__in=teacher_courses
+        course__in=course_ids
     ).select_related('user', 'course')
 
+    if course_id:
+        students = students.filter(course_id=course_id)
+    return students
+
+
+def roster_page(request):
+    course_id = request.GET.get('course', '')
+    students = teacher_roster(request.user, course_id if course_id.isdigit() else None)
+    cursor = request.GET.get('cursor')
+    search = request.GET.get('q', '').strip()
+
+    if not search:
+        return keyset_paginate(students, ROSTER_ORDERING, cursor=cursor, size=ROSTER_PAGE_SIZE)
+
+    # Prefix matches as ranges rather than LIKE, so each is an index range
+    # scan: usernames on auth_user's unique index, roll numbers on the roster's
+    end = search + '\U0010ffff'
+    usernames = User.objects.filter(username__gte=search, username__lt=end).values('id')
+    return keyset_paginate_any(
+        students,
+        [Q(user_id__in=usernames), Q(roll_number__gte=search, roll_number__lt=end)],
+        ROSTER_ORDERING, cursor=cursor, size=ROSTER_PAGE_SIZE
+    )
+
+
+@teacher_required
+def teacher_student(request):
+    # One page of the roster; the rest is loaded on demand
+    students, next_cursor = roster_page(request)
+    courses = Course.objects.filter(
+        id__in=Exam.objects.filter(created_by=request.user).values('subject__course_id')
+    ).order_by('name')
+
     context = {
         'students': students,
+        'next_cursor': next_cursor,
+        'courses': courses,
+        'selected_course': request.GET.get('course', ''),
+        'search': request.GET.get('q', ''),
     }
 
     return render(request, 'accounts/teacher_student.html', context)
+
+
+# ===== Roster feed (JSON, for loading more students) =====
+@teacher_required
+def teacher_student_feed(request):
+    students, next_cursor = roster_page(request)
+
+    return JsonResponse({
+        'results': [
+            {
+                'id': student.id,
+                'name': student.user.get_full_name(),
+                'username': student.user.username,
+                'roll_number': student.roll_number,
+                'course': student.course.name,
+                'approved': student.approved,
+            }
+            for student in students
+        ],
+        'next': next_cursor,
+    })
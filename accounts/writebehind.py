@@ -0,0 +1,295 @@
+"""
+Optional write-behind for exam submissions (settings.EXAM_WRITE_BEHIND).
+
+A graded submission is appended to a local journal and fsynced before the
+student gets a response. A background thread then applies the journaled
+submissions in batches, one transaction per batch, instead of one small
+transaction per request.
+
+Each process appends to its own journal segment and holds an exclusive
+lock on it for as long as the segment is in use. A segment that can be
+locked by somebody else was left behind by a process that died before
+flushing it, and is replayed. Applying a submission is idempotent (only
+attempts not yet submitted are updated), so replaying a segment that was
+partly written to the database is safe.
+
+The in-memory set of journaled attempts is per process, so before a
+submission is journaled the attempt is also claimed in the shared cache
+(``claim``): a second submission handled by another worker is then
+rejected like one that already reached the database. This needs a cache
+shared by the workers (REDIS_URL).
+"""
+import atexit
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from .models import AnswerDraft, StudentExam, Result, ExamStatistics
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = '.journal'
+
+# Claims are removed by the flush that marks the attempts submitted in the
+# database; the timeout covers a process that died before flushing, until
+# its segment is replayed
+CLAIM_TIMEOUT = 24 * 60 * 60
+
+
+def enabled():
+    return getattr(settings, 'EXAM_WRITE_BEHIND', False)
+
+
+def _claim_key(student_exam_id):
+    return f'attempt:{student_exam_id}:submitted'
+
+
+def claim(student_exam_id):
+    """
+    Mark an attempt as submitted for every process sharing the cache;
+    returns False if a submission for it was already claimed
+    """
+    return cache.add(_claim_key(student_exam_id), True, CLAIM_TIMEOUT)
+
+
+def release(student_exam_id):
+    cache.delete(_claim_key(student_exam_id))
+
+
+def read_segment(path_or_file):
+    """
+    Submission records in a segment. A torn last line (the process died
+    mid-write, before the fsync that acknowledges it) is ignored.
+    """
+    if isinstance(path_or_file, str):
+        with open(path_or_file, 'rb') as segment:
+            return read_segment(segment)
+
+    path_or_file.seek(0)
+    records = []
+    for line in path_or_file:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+    return records
+
+
+def apply_submissions(records, batch_size=None):
+    """
+    Write journaled submissions to the database; returns how many were new
+    """
+    batch_size = batch_size or settings.EXAM_FLUSH_BATCH_SIZE
+    # A student who submitted twice before the first flush keeps the first answer
+    by_attempt = {}
+    for record in records:
+        by_attempt.setdefault(record['student_exam'], record)
+    pending = list(by_attempt.values())
+
+    applied = 0
+    for start in range(0, len(pending), batch_size):
+        batch = {record['student_exam']: record for record in pending[start:start + batch_size]}
+        with transaction.atomic():
+            attempts = list(
+                StudentExam.objects.select_for_update().filter(pk__in=batch, is_submitted=False)
+            )
+            scores = defaultdict(list)
+            for attempt in attempts:
+                record = batch[attempt.pk]
+                attempt.score = record['score']
+                attempt.is_submitted = True
+                # Journals written before responses were kept have none
+                responses = record.get('responses')
+                attempt.responses = bytes.fromhex(responses) if responses is not None else None
+                attempt.key_version = record.get('key_version')
+                scores[attempt.exam_id].append(attempt.score)
+
+            StudentExam.objects.bulk_update(attempts, ['score', 'is_submitted', 'responses', 'key_version'])
+            AnswerDraft.objects.filter(student_exam__in=attempts).delete()
+            Result.objects.bulk_create([
+                Result(student_id=batch[attempt.pk]['profile'], exam_id=attempt.exam_id, score=attempt.score)
+                for attempt in attempts
+            ])
+            for exam_id, exam_scores in scores.items():
+                ExamStatistics.record(exam_id, exam_scores)
+        applied += len(attempts)
+    return applied
+
+
+def replay(directory=None):
+    """
+    Apply and remove every segment in ``directory`` that no live process
+    holds; returns the number of submissions written
+    """
+    directory = directory or settings.EXAM_JOURNAL_DIR
+    applied = 0
+    for path in sorted(glob.glob(os.path.join(directory, f'*{SEGMENT_SUFFIX}'))):
+        try:
+            segment = open(path, 'rb')
+        except FileNotFoundError:
+            # Flushed and removed by its owner in the meantime
+            continue
+        with segment:
+            try:
+                fcntl.flock(segment, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Still in use by a running process
+                continue
+            applied += apply_submissions(read_segment(segment))
+            os.unlink(path)
+    return applied
+
+
+class WriteBehind:
+    """
+    Journal writer and flusher for one process
+    """
+    def __init__(self, directory, interval, batch_size):
+        self.directory = directory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pending = set()
+        # Segments waiting to be flushed, oldest first, each as (file, path, student_exam ids)
+        self.sealed = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._open_segment()
+
+    def _open_segment(self):
+        self.path = os.path.join(self.directory, f'{os.getpid()}-{time.time_ns()}{SEGMENT_SUFFIX}')
+        self.segment = open(self.path, 'a+b')
+        # Held until the segment has been flushed and removed
+        fcntl.flock(self.segment, fcntl.LOCK_EX)
+        self.segment_ids = []
+
+    def append(self, student_exam, profile, score, responses=None, key_version=None):
+        """
+        Journal one graded submission; it is durable when this returns
+        """
+        line = json.dumps({
+            'student_exam': student_exam.pk,
+            'profile': profile.pk,
+            'exam': student_exam.exam_id,
+            'score': score,
+            'responses': responses.hex() if responses is not None else None,
+            'key_version': key_version,
+        }).encode() + b'\n'
+        with self._lock:
+            self.segment.write(line)
+            self.segment.flush()
+            os.fsync(self.segment.fileno())
+            self.segment_ids.append(student_exam.pk)
+            self.pending.add(student_exam.pk)
+
+    def seal(self):
+        """
+        Start a new segment if the current one has records
+        """
+        with self._lock:
+            if self.segment_ids:
+                self.sealed.append((self.segment, self.path, self.segment_ids))
+                self._open_segment()
+
+    def flush(self):
+        """
+        Write every journaled submission to the database
+        """
+        with self._flush_lock:
+            self.seal()
+            while self.sealed:
+                segment, path, ids = self.sealed[0]
+                apply_submissions(read_segment(segment), self.batch_size)
+                # Remove before unlocking, so no other process replays it
+                os.unlink(path)
+                segment.close()
+                self.sealed.pop(0)
+                with self._lock:
+                    self.pending.difference_update(ids)
+                # The database now says these attempts are submitted
+                cache.delete_many([_claim_key(pk) for pk in ids])
+
+    def run(self):
+        try:
+            replay(self.directory)
+        except Exception:
+            logger.exception('Replaying the submission journal failed')
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                # The segments are kept and retried on the next tick
+                logger.exception('Flushing journaled submissions failed')
+            finally:
+                close_old_connections()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name='exam-write-behind', daemon=True)
+        self._thread.start()
+
+    def stop(self, flush=True):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if flush:
+            self.flush()
+        with self._lock:
+            # An empty current segment is simply discarded
+            if not self.segment_ids:
+                os.unlink(self.path)
+            self.segment.close()
+            for segment, path, ids in self.sealed:
+                segment.close()
+
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_write_behind():
+    """
+    This process's journal, started on first use. Starting it also
+    replays segments left by processes that crashed.
+    """
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = WriteBehind(
+                str(settings.EXAM_JOURNAL_DIR),
+                settings.EXAM_FLUSH_INTERVAL,
+                settings.EXAM_FLUSH_BATCH_SIZE,
+            )
+            _instance.start()
+        return _instance
+
+
+def is_pending(student_exam_id):
+    """
+    Journaled, by this or another process, but maybe not yet in the database
+    """
+    if _instance is not None and student_exam_id in _instance.pending:
+        return True
+    return enabled() and cache.get(_claim_key(student_exam_id)) is not None
+
+
+def shutdown(flush=True):
+    global _instance
+    with _instance_lock:
+        if _instance is not None:
+            _instance.stop(flush=flush)
+            _instance = None
+
+
+atexit.register(shutdown)
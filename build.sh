@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+# Build step for deployment: install, bundle static files, migrate
+set -o errexit
+
+pip install -r requirements.txt
+python manage.py collectstatic --no-input
+python manage.py migrate
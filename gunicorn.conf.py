@@ -0,0 +1,73 @@
+# Gunicorn settings, read automatically when gunicorn starts in this directory.
+# Pick the worker model with GUNICORN_WORKER_CLASS:
+#
+#   gthread  (default) a pool of threads per worker
+#   uvicorn  the ASGI application, running the async views natively
+#   sync     one request at a time per worker
+#
+# gevent is not offered: the async views (login, exam submission) fail
+# under its monkey-patching, because asgiref then sees two event loops in
+# what it takes for one thread.
+#
+# WEB_CONCURRENCY sets the number of worker processes and GUNICORN_THREADS
+# the threads per gthread worker. PORT is honoured by gunicorn itself.
+#
+# Without REDIS_URL every worker has its own in-memory cache, so answer
+# keys and papers are built once per worker rather than once in total;
+# set it whenever more than one worker runs.
+import math
+import os
+
+# Default worker count: 2 x CPUs + 1, but no more than this
+MAX_DEFAULT_WORKERS = 4
+
+
+def available_cpus():
+    """
+    CPUs this process may use: its affinity mask and, inside a container,
+    the cgroup CPU quota, which os.cpu_count() ignores (it reports the
+    host's cores)
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as handle:
+            quota, period = handle.read().split()
+        if quota != 'max':
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+worker_model = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+workers = int(os.environ.get('WEB_CONCURRENCY', min(available_cpus() * 2 + 1, MAX_DEFAULT_WORKERS)))
+# More than one thread would turn sync workers into gthread ones
+threads = int(os.environ.get('GUNICORN_THREADS', '4')) if worker_model == 'gthread' else 1
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+keepalive = 5
+# Recycle workers now and then, so a slow leak cannot grow without bound
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = max_requests // 10
+
+wsgi_app = 'myproject.wsgi:application'
+
+if worker_model == 'uvicorn':
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    wsgi_app = 'myproject.asgi:application'
+    # Under ASGI every request runs its sync code on a fresh thread, so a
+    # persistent connection would never be reused; use DB_POOL=1 instead
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+else:
+    worker_class = worker_model
+
+
+def on_starting(server):
+    if workers > 1 and not os.environ.get('REDIS_URL'):
+        server.log.warning(
+            'REDIS_URL is not set: each of the %d workers keeps its own cache, '
+            'which is emptied whenever the worker is recycled', workers
+        )
@@ -46,13 +46,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Serves static files before sessions and auth do any work
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # request.profile, loaded with the user by ProfileBackend
+    'accounts.middleware.UserContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-     'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
 ROOT_URLCONF = 'myproject.urls'
@@ -61,7 +64,9 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],  # your global templates folder
-        'APP_DIRS': True,  # allows templates inside app folders
+        # APP_DIRS cannot be combined with 'loaders'; app templates are found
+        # by the app_directories loader inside the cached loader instead
+        'APP_DIRS': False,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -69,6 +74,13 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates are compiled once per process and kept in memory
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -88,12 +100,92 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 # }
 
 
+# Each worker thread keeps its connection for DB_CONN_MAX_AGE seconds
+# (0 closes it after every request) and checks that it is still alive
+# before reusing it.
 DATABASES = {
     'default': dj_database_url.config(
-        default='sqlite:///db.sqlite3'
+        default='sqlite:///db.sqlite3',
+        conn_max_age=int(os.environ.get('DB_CONN_MAX_AGE', '600')),
+        conn_health_checks=True,
     )
 }
 
+# DB_POOL=1 shares a psycopg connection pool per process instead (PostgreSQL
+# only). Persistent connections then have to be off, as Django requires.
+if os.environ.get('DB_POOL') == '1' and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        'timeout': 10,
+    }
+
+
+# Cache
+# Answer keys and rendered exam papers are shared through this cache.
+# Their versions live on the exam rows, so a per-process cache stays
+# correct, but every worker then builds its own copies: set REDIS_URL to
+# share them between processes in production.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Write-behind for exam submissions
+# With EXAM_WRITE_BEHIND=1 a submission is acknowledged once it is fsynced
+# to a journal in EXAM_JOURNAL_DIR, and a background thread writes the
+# journaled submissions to the database in batches (accounts.writebehind).
+# Duplicate submissions are refused across workers through the cache, so
+# with more than one worker set REDIS_URL as well.
+
+EXAM_WRITE_BEHIND = os.environ.get('EXAM_WRITE_BEHIND') == '1'
+EXAM_JOURNAL_DIR = os.environ.get('EXAM_JOURNAL_DIR', str(BASE_DIR / 'journal'))
+EXAM_FLUSH_INTERVAL = float(os.environ.get('EXAM_FLUSH_INTERVAL', '0.5'))
+EXAM_FLUSH_BATCH_SIZE = 500
+
+
+# Email (password reset links)
+# Without EMAIL_HOST messages are printed to the console instead of sent.
+
+if os.environ.get('EMAIL_HOST'):
+    EMAIL_HOST = os.environ['EMAIL_HOST']
+    EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
+    EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+    EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+    EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '1') == '1'
+else:
+    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'ExamSphere <noreply@examsphere.local>')
+
+
+# Loads the profile and course in the same query as the user
+AUTHENTICATION_BACKENDS = ['accounts.backends.ProfileBackend']
+
+# PBKDF2 work factor; stored hashes follow it at each user's next login.
+# Lowering it trades brute-force resistance for login throughput.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', '1200000'))
+
+PASSWORD_HASHERS = [
+    'accounts.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -135,9 +227,24 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic (see build.sh) writes content-hashed copies of every file
+# with gzip and brotli versions next to them; whitenoise serves the hashed
+# names with far-future, immutable cache headers. Until collectstatic has
+# run, pages link the plain names (accounts.storage).
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'accounts.storage.CollectedStaticFilesStorage',
+    },
+}
+
 # edited 
 LOGIN_REDIRECT_URL = '/accounts/dashboard/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 ALLOWED_HOSTS = ["student-examination-system-3.onrender.com",
     ".onrender.com",]
+# More hosts, comma-separated (e.g. 127.0.0.1 for a local benchmark server)
+ALLOWED_HOSTS += [host for host in os.environ.get('EXTRA_ALLOWED_HOSTS', '').split(',') if host]
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')